@@ -3,6 +3,8 @@ from bs4 import BeautifulSoup
 import os
 import time
 
+from bbc_cleaner import DomCleaner
+
 # 目标网页 URL
 url = 'https://www.bbc.co.uk/learningenglish/chinese/features/english-in-a-minute/ep-250207'
 # 请求头部，模拟浏览器访问
@@ -50,10 +52,9 @@ elements_to_remove = [
     ('div', {'id': 'heading-intermediate-level'})
 ]
 
-for element in elements_to_remove:
-    part = article.find(*element)
-    if part:
-        part.decompose()  # 删除该部分
+# 一次遍历删除所有匹配的部分
+removed = DomCleaner(elements_to_remove).clean(article)
+print(f"已删除: {dict(removed)}")
 
 # 从 URL 中提取最后一个斜杠后的部分作为文件名
 file_name = url.split('/')[-1]
@@ -0,0 +1,6 @@
+from bbc_scraper import main
+
+
+if __name__ == "__main__":
+    # 在一个进程中并发爬取所有栏目，共用连接池、限速和调度
+    main()
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+from bbc_metrics import ASSET_QUEUE
+
+
+T = TypeVar('T')
+
+
+class HostLimiter:
+    """按主机限制同时进行的请求数"""
+
+    def __init__(self, per_host: int = 4):
+        self.per_host = max(1, per_host)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, url: str):
+        """在该URL所属主机的并发额度内执行请求"""
+        semaphore = self._semaphore(urlparse(url).netloc)
+        with semaphore:
+            yield
+
+
+async def _run_all(func: Callable[[str], Optional[T]], urls: List[str],
+                   concurrency: int, logger=None) -> List[Optional[T]]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def run_one(index: int, url: str) -> Optional[T]:
+        async with semaphore:
+            if logger:
+                logger.info(f"正在处理第 {index}/{len(urls)} 篇文章: {url}")
+            try:
+                return await loop.run_in_executor(executor, func, url)
+            except Exception as e:
+                if logger:
+                    logger.error(f"处理文章失败 {url}: {str(e)}")
+                return None
+
+    try:
+        tasks = [run_one(index, url) for index, url in enumerate(urls, 1)]
+        # gather 按传入顺序返回结果，保证与顺序爬取的列表顺序一致
+        return await asyncio.gather(*tasks)
+    finally:
+        executor.shutdown(wait=True)
+
+
+def crawl_articles(func: Callable[[str], Optional[T]], urls: List[str],
+                   concurrency: int = 4, logger=None) -> List[T]:
+    """并发执行 func(url)，按 urls 的顺序返回成功的结果"""
+    results = asyncio.run(_run_all(func, urls, max(1, concurrency), logger))
+    return [result for result in results if result is not None]
+
+
+class AssetStage:
+    """资源下载阶段：有界线程池，与文章的解析和写入并行进行
+
+    max_pending 限制排队中的下载数，超过时 submit 阻塞，避免内存中堆积过多任务。
+    """
+
+    def __init__(self, workers: int = 4, max_pending: Optional[int] = None, logger=None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 4
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._depth = 0
+        self.peak_depth = 0
+
+    @property
+    def depth(self) -> int:
+        """队列深度：已提交但还没完成的下载数"""
+        with self._lock:
+            return self._depth
+
+    def submit(self, jobs: List[Callable[[], bool]], on_done: Optional[Callable[[bool], None]] = None):
+        """提交一篇文章的所有下载任务，全部结束后调用 on_done(是否全部成功)"""
+        if not jobs:
+            if on_done:
+                on_done(True)
+            return
+
+        remaining = [len(jobs)]
+        all_ok = [True]
+
+        def run(job: Callable[[], bool]):
+            ok = False
+            try:
+                ok = bool(job())
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"资源下载任务失败: {str(e)}")
+            finally:
+                with self._lock:
+                    self._depth -= 1
+                    ASSET_QUEUE.labels().set(self._depth)
+                    remaining[0] -= 1
+                    all_ok[0] = all_ok[0] and ok
+                    finished = remaining[0] == 0
+                self._slots.release()
+            if finished and on_done:
+                on_done(all_ok[0])
+
+        for job in jobs:
+            self._slots.acquire()
+            with self._lock:
+                self._depth += 1
+                self.peak_depth = max(self.peak_depth, self._depth)
+                ASSET_QUEUE.labels().set(self._depth)
+            self._executor.submit(run, job)
+
+    def join(self):
+        """等待所有已提交的下载完成"""
+        self._executor.shutdown(wait=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        if self.logger:
+            self.logger.info(f"资源下载阶段完成，队列最大深度 {self.peak_depth}")
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+
+@dataclass(frozen=True)
+class CategoryConfig:
+    """栏目配置：各栏目的爬虫只在这些地方不同"""
+    category: str
+    media_class: str  # 封面图片所在的容器: audio-player / image-single / video-player
+    has_mp4: bool = False  # 索引中是否带 mp4_url（白领英语）
+
+    @property
+    def list_url(self) -> str:
+        return f'https://www.bbc.co.uk/learningenglish/chinese/features/{self.category}'
+
+    @property
+    def directories(self) -> Tuple[str, ...]:
+        return ('img', 'pdf', 'mp3', 'mp4') if self.has_mp4 else ('img', 'pdf', 'mp3')
+
+
+CATEGORIES: Dict[str, CategoryConfig] = {config.category: config for config in [
+    CategoryConfig('take-away-english', 'audio-player'),    # 随身英语
+    CategoryConfig('media-english', 'audio-player'),        # 媒体英语
+    CategoryConfig('authentic-real-english', 'audio-player'),  # 地道英语
+    CategoryConfig('q-and-a', 'audio-player'),              # 你问我答
+    CategoryConfig('todays-phrase', 'image-single'),        # 今日短语
+    CategoryConfig('english-quizzes', 'image-single'),      # 英语小测验
+    CategoryConfig('english-at-work', 'video-player', has_mp4=True),  # 白领英语
+]}
@@ -0,0 +1,138 @@
+import argparse
+import copy
+import glob
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+
+logger = logging.getLogger(__name__)
+
+Rule = Tuple[str, dict]  # 与 find_all(name, attrs) 的参数相同，例如 ('div', {'class': 'clearfix'})
+
+
+def rule_name(rule: Rule) -> str:
+    tag, attrs = rule
+    return tag + ''.join(f"[{key}={value}]" for key, value in attrs.items())
+
+
+def _attr_matcher(key: str, value: str):
+    """按 BeautifulSoup 的规则匹配属性：带空格的 class 要求整串相同，否则匹配其中一个"""
+    if key == 'class':
+        if ' ' in value:
+            return lambda tag: ' '.join(tag.get('class') or ()) == value
+        return lambda tag: value in (tag.get('class') or ())
+    return lambda tag: tag.get(key) == value
+
+
+class DomCleaner:
+    """把多条删除规则编译在一起，一次遍历文章树删除所有匹配的节点
+
+    被删除的节点不再向下遍历，结果与逐条规则调用 find_all 再 decompose 相同。
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self._by_tag: Dict[str, List[tuple]] = {}
+        for rule in self.rules:
+            tag, attrs = rule
+            matchers = [_attr_matcher(key, value) for key, value in attrs.items()]
+            self._by_tag.setdefault(tag, []).append((rule_name(rule), matchers))
+        self.removed = Counter()  # 规则 -> 累计删除的节点数
+        self._lock = threading.Lock()
+
+    def _match(self, tag: Tag) -> Optional[str]:
+        for name, matchers in self._by_tag.get(tag.name, ()):
+            if all(matcher(tag) for matcher in matchers):
+                return name
+        return None
+
+    def clean(self, root: Tag) -> Counter:
+        """删除 root 下所有匹配的节点，返回本次各规则删除的节点数"""
+        removed = Counter()
+        to_remove = []
+        stack = list(reversed(root.contents))
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, Tag):
+                continue
+            name = self._match(node)
+            if name:
+                removed[name] += 1
+                to_remove.append(node)
+            else:
+                stack.extend(reversed(node.contents))
+
+        for node in to_remove:
+            node.decompose()
+        self.merge(removed)
+        return removed
+
+    def merge(self, counts: Counter):
+        """把其他进程中的删除统计合并进来"""
+        with self._lock:
+            self.removed.update(counts)
+
+    def log_stats(self, logger):
+        for rule in self.rules:
+            name = rule_name(rule)
+            logger.info(f"清理规则 {name}: 删除 {self.removed[name]} 个节点")
+
+
+def legacy_clean(root: Tag, rules: List[Rule]) -> Tag:
+    """原来的实现：每条规则一次 find_all，用于对比"""
+    for rule in rules:
+        for part in root.find_all(*rule):
+            part.decompose()
+    return root
+
+
+def benchmark(paths: List[str], rules: List[Rule], parser: str = 'html.parser') -> bool:
+    """对比逐条 find_all 和单次遍历的耗时，并检查两者结果相同"""
+    articles = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            article = BeautifulSoup(f.read(), parser).find('div', {'role': 'article'})
+        if article:
+            articles.append(article)
+
+    legacy_copies = [copy.copy(article) for article in articles]
+    start = time.perf_counter()
+    for article in legacy_copies:
+        legacy_clean(article, rules)
+    legacy_time = time.perf_counter() - start
+
+    cleaner = DomCleaner(rules)
+    single_copies = [copy.copy(article) for article in articles]
+    start = time.perf_counter()
+    for article in single_copies:
+        cleaner.clean(article)
+    single_time = time.perf_counter() - start
+
+    mismatched = sum(str(a) != str(b) for a, b in zip(legacy_copies, single_copies))
+    count = len(articles)
+    if count:
+        logger.info(f"{count} 篇文章，逐条 find_all: {count / legacy_time:.0f} 篇/秒，"
+                    f"单次遍历: {count / single_time:.0f} 篇/秒，结果不同 {mismatched} 篇")
+        cleaner.log_stats(logger)
+    return mismatched == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比单次遍历清理和逐条 find_all 清理的吞吐量')
+    parser.add_argument('pages', nargs='*', default=['take-away-english/*.html'], help='已保存的页面')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from bbc_scraper import ELEMENTS_TO_REMOVE
+
+    paths = sorted(path for pattern in args.pages for path in glob.glob(pattern))
+    raise SystemExit(0 if benchmark(paths, ELEMENTS_TO_REMOVE) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+
+CHUNK_SIZE = 64 * 1024  # 每次写入64KB
+
+
+class IncompleteDownload(Exception):
+    """下载的大小与服务器给出的长度不符，通常是连接中途断开，可以续传重试"""
+
+
+def _read_meta(meta_path: str) -> dict:
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta_path: str, meta: dict):
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _remove(*paths: str):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _total_length(response, offset: int) -> Optional[int]:
+    """从响应头计算文件的完整长度，无法确定时返回 None"""
+    if response.status_code == 206:
+        # Content-Range: bytes 1000-4999/5000
+        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def stream_download(http, url: str, output_path: str, timeout: int = 30,
+                    chunk_size: int = CHUNK_SIZE) -> Tuple[int, float, int]:
+    """分块下载到 <output_path>.part，大小与 Content-Length 一致后原子地重命名为 output_path
+
+    <output_path>.part.json 记录 URL、预期长度和 ETag。上次下载中断留下的 .part
+    文件会用 Range 请求续传，只下载缺少的部分。
+    返回 (本次写入字节数, 耗时秒数, 续传起点)。
+    """
+    tmp_path = output_path + '.part'
+    meta_path = tmp_path + '.json'
+    meta = _read_meta(meta_path)
+
+    offset = 0
+    if os.path.exists(tmp_path) and meta.get('url') == url:
+        offset = os.path.getsize(tmp_path)
+    else:
+        _remove(tmp_path, meta_path)
+        meta = {}
+
+    # 要求原始字节，保证 Range 偏移和 Content-Length 都以文件字节计
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        if meta.get('etag'):
+            headers['If-Range'] = meta['etag']
+
+    start = time.perf_counter()
+    written = 0
+    restart = False
+    with http.stream(url, timeout=timeout, headers=headers) as response:
+        if offset and response.status_code == 416:
+            # 请求范围越界：.part 已经完整，或者服务器上的文件变了
+            restart = meta.get('length') != offset
+            expected = offset
+        else:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # 服务器不支持续传或文件已变化，从头开始
+                offset = 0
+            expected = _total_length(response, offset)
+            _write_meta(meta_path, {'url': url, 'length': expected,
+                                    'etag': response.headers.get('ETag')})
+            with open(tmp_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        written += len(chunk)
+
+    if restart:
+        # 先关闭响应、释放该主机的并发额度，再从头下载
+        _remove(tmp_path, meta_path)
+        return stream_download(http, url, output_path, timeout, chunk_size)
+    size = os.path.getsize(tmp_path)
+    if expected is not None and size != expected:
+        raise IncompleteDownload(f"下载不完整: {size}/{expected} 字节，保留 {tmp_path} 以便续传")
+    os.replace(tmp_path, output_path)
+    _remove(meta_path)
+    return written, time.perf_counter() - start, offset
+
+
+def format_rate(size: int, elapsed: float) -> str:
+    """格式化下载速度"""
+    rate = size / elapsed if elapsed > 0 else 0.0
+    for unit in ('B/s', 'KB/s', 'MB/s'):
+        if rate < 1024 or unit == 'MB/s':
+            return f"{rate:.1f} {unit}"
+        rate /= 1024
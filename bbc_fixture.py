@@ -0,0 +1,326 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from bbc_categories import CATEGORIES
+from bbc_http import HttpClient
+from bbc_index import ArticleIndex
+from bbc_scraper import HEADERS, LIST_CLASS, BBCLearningEnglishScraper
+
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_BASE = 'https://www.bbc.co.uk/learningenglish/chinese/features'
+DOWNLOAD_BASE = 'https://downloads.bbc.co.uk/learningenglish/features'
+
+
+class FixtureStore:
+    """录制的HTTP响应：index.json 记录 URL -> 状态码、Content-Type 和内容哈希，
+    objects/ 按内容哈希保存响应体，相同内容只存一份
+    """
+
+    def __init__(self, root: str = 'fixtures'):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def put(self, url: str, body: bytes, status: int = 200, content_type: str = 'text/html; charset=utf-8'):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.entries[url] = {'status': status, 'content_type': content_type, 'sha256': digest}
+
+    def get(self, url: str) -> Optional[Tuple[dict, bytes]]:
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        with open(self._object_path(entry['sha256']), 'rb') as f:
+            return entry, f.read()
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            entries = dict(sorted(self.entries.items()))
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+
+
+class RecordingHttpClient(HttpClient):
+    """正常访问网络，同时把列表页、文章页和资源的完整响应录制到 FixtureStore"""
+
+    def __init__(self, store: FixtureStore, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+
+    def _send(self, url: str, timeout: int, **kwargs):
+        # 录制完整响应：不流式读取，也不发续传的 Range 请求
+        kwargs.pop('stream', None)
+        headers = {key: value for key, value in (kwargs.pop('headers', None) or {}).items()
+                   if key not in ('Range', 'If-Range')}
+        response = super()._send(url, timeout, headers=headers, **kwargs)
+        self.store.put(url, response.content, response.status_code,
+                       response.headers.get('Content-Type', 'application/octet-stream'))
+        return response
+
+
+def replay_url(server_url: str, url: str) -> str:
+    """https://host/path -> http://127.0.0.1:port/https/host/path"""
+    parts = urlsplit(url)
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{server_url}/{parts.scheme}/{parts.netloc}{parts.path}{query}'
+
+
+def original_url(path: str) -> str:
+    scheme, _, rest = path.lstrip('/').partition('/')
+    return f'{scheme}://{rest}'
+
+
+class ReplayHttpClient(HttpClient):
+    """把所有请求改发到本地回放服务器，爬虫的其他代码不需要修改
+
+    每主机并发数仍按原始主机计算；限速器和连接池看到的都是本地服务器这一个主机。
+    """
+
+    def __init__(self, server_url: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server_url = server_url.rstrip('/')
+
+    def _send(self, url: str, timeout: int, **kwargs):
+        return super()._send(replay_url(self.server_url, url), timeout, **kwargs)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """本地回放服务器，可以给每个请求加上延迟，并按比例返回 503 错误"""
+
+    daemon_threads = True
+
+    def __init__(self, store: FixtureStore, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        super().__init__(('127.0.0.1', port), FixtureHandler)
+        self.store = store
+        self.latency = latency  # 每个请求固定延迟的秒数
+        self.jitter = jitter  # 额外的随机延迟上限（秒）
+        self.error_rate = error_rate  # 返回 503 的请求比例
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'missing': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def start(self) -> 'FixtureServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server: FixtureServer
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+        with server._lock:
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+            fail = server.rng.random() < server.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            server.count('errors')
+            self._reply(503, b'injected error', 'text/plain', {'Retry-After': '0'})
+            return
+        fixture = server.store.get(original_url(self.path))
+        if fixture is None:
+            server.count('missing')
+            self._reply(404, b'not recorded', 'text/plain')
+            return
+        entry, body = fixture
+        self._reply(entry['status'], body, entry['content_type'])
+        server.count('bytes', len(body))
+
+    def _reply(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _article_page(page: str, media_class: str, pdf_url: str, mp3_url: str) -> str:
+    """把保存的文章页面改成线上文章页的样子：换成栏目的封面容器，补上文字稿和音频的下载链接"""
+    page = page.replace('class="audio-player"', f'class="{media_class}"')
+    links = f'<a href="{pdf_url}">下载文字稿</a><a href="{mp3_url}">下载音频</a>'
+    close = page.rfind('</div>')
+    return page[:close] + links + page[close:]
+
+
+def seed_from_pages(store: FixtureStore, pages: List[str], categories: Iterable[str],
+                    image_size: int = 30_000, pdf_size: int = 80_000, mp3_size: int = 1_000_000,
+                    seed: int = 0) -> int:
+    """用已保存的 take-away-english 页面为每个栏目生成一套假的列表页、文章页和资源
+
+    资源内容是随机字节，同类资源共用一份内容。返回生成的文章页数。
+    """
+    rng = random.Random(seed)
+    image, pdf, mp3 = (rng.randbytes(size) for size in (image_size, pdf_size, mp3_size))
+    count = 0
+    for category in categories:
+        config = CATEGORIES[category]
+        items = []
+        for path in pages:
+            base_name = os.path.splitext(os.path.basename(path))[0]
+            url = f'{ARTICLE_BASE}/{category}/{base_name}'
+            pdf_url = f'{DOWNLOAD_BASE}/{category}/{base_name}.pdf'
+            mp3_url = f'{DOWNLOAD_BASE}/{category}/{base_name}.mp3'
+            with open(path, 'r', encoding='utf-8') as f:
+                page = f.read()
+            store.put(url, _article_page(page, config.media_class, pdf_url, mp3_url).encode('utf-8'))
+            # 保存的页面中封面已经改成了 github.io 的地址，录制这个地址
+            for img_url in re.findall(r'<img [^>]*src="([^"]+)"', page)[:1]:
+                store.put(img_url, image, content_type='image/jpeg')
+            store.put(pdf_url, pdf, content_type='application/pdf')
+            store.put(mp3_url, mp3, content_type='audio/mpeg')
+            items.append(f'<li class="course-content-item"><h2><a href="/learningenglish/chinese/features/'
+                         f'{category}/{base_name}">Episode {base_name} 测试文章</a></h2></li>')
+            count += 1
+        # 列表页按从新到旧排列
+        list_page = f'<html><body><div class="{LIST_CLASS}"><ul>{"".join(reversed(items))}</ul></div></body></html>'
+        store.put(config.list_url, list_page.encode('utf-8'))
+    store.save()
+    return count
+
+
+def record(store: FixtureStore, categories: List[str], count: int):
+    """真实爬取各栏目最新的 count 篇文章，并录制所有响应"""
+    for category in categories:
+        http = RecordingHttpClient(store, HEADERS)
+        scraper = BBCLearningEnglishScraper(category, count=count, concurrency=1, http=http)
+        scraper.scrape_all_articles(scraper.list_url)
+        store.save()
+        logger.info(f"{category}: 已录制 {len(store.entries)} 个响应")
+
+
+def check_corrupt_index(store: FixtureStore, category: str, count: int = 3) -> bool:
+    """通过回放服务器完整爬取两次，第二次之前损坏索引中间的一行，检查第二次爬取能重建索引
+
+    在临时目录中运行，不影响当前目录的输出。返回是否通过。
+    """
+    server = FixtureServer(store).start()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+
+            def crawl():
+                http = ReplayHttpClient(server.url, HEADERS)
+                scraper = BBCLearningEnglishScraper(category, count=count, concurrency=1, http=http)
+                try:
+                    return scraper.scrape_all_articles(scraper.list_url)
+                finally:
+                    http.close()
+
+            articles = crawl()
+            index = ArticleIndex(category)
+            with open(index.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            if len(articles) < 2 or len(lines) != len(articles):
+                logger.error(f"第一次爬取得到 {len(articles)} 篇文章，索引 {len(lines)} 行")
+                return False
+            lines[len(lines) // 2] = '{"article_id": "损坏\n'
+            with open(index.path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+
+            try:
+                articles = crawl()
+                ids = [article['article_id'] for article in index]
+            except ValueError as e:
+                logger.error(f"损坏的索引没有被重建: {e}")
+                return False
+            if ids != [article['article_id'] for article in articles]:
+                logger.error(f"重建后的索引与爬取结果不一致: {ids}")
+                return False
+            logger.info(f"{category}: 损坏的索引已重建，共 {len(ids)} 篇文章")
+            return True
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制和回放爬虫的HTTP请求')
+    parser.add_argument('--fixtures', default='fixtures', help='录制文件目录')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='用已保存的页面生成各栏目的假数据')
+    seed.add_argument('pages', nargs='*', default=['take-away-english/*.html'])
+    seed.add_argument('--categories', nargs='*', default=list(CATEGORIES))
+
+    rec = commands.add_parser('record', help='真实爬取并录制响应')
+    rec.add_argument('categories', nargs='*', default=list(CATEGORIES))
+    rec.add_argument('--count', type=int, default=20, help='每个栏目录制的文章数')
+
+    serve = commands.add_parser('serve', help='启动回放服务器')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    serve.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟的上限（秒）')
+    serve.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的请求比例')
+    check = commands.add_parser('check-index', help='检查完整爬取能重建损坏的索引')
+    check.add_argument('category', nargs='?', default='media-english')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = FixtureStore(args.fixtures)
+    if args.command == 'seed':
+        pages = sorted(path for pattern in args.pages for path in glob.glob(pattern))
+        count = seed_from_pages(store, pages, args.categories)
+        logger.info(f"生成 {count} 个文章页，共 {len(store.entries)} 个响应: {store.index_path}")
+    elif args.command == 'record':
+        record(store, args.categories, args.count)
+    elif args.command == 'check-index':
+        raise SystemExit(0 if check_corrupt_index(store, args.category) else 1)
+    else:
+        server = FixtureServer(store, args.port, args.latency, args.jitter, args.error_rate)
+        logger.info(f"回放服务器: {server.url}（{len(store.entries)} 个响应）")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        logger.info(f"请求 {server.stats['requests']} 次，注入错误 {server.stats['errors']} 次，"
+                    f"未录制 {server.stats['missing']} 次")
+
+
+if __name__ == "__main__":
+    main()
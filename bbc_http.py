@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bbc_async import HostLimiter
+from bbc_metrics import HTTP_REQUESTS, THROTTLE_SECONDS
+
+
+# 各主机的连接池大小，未列出的主机使用 default_pool_size
+DEFAULT_POOL_SIZES = {
+    'www.bbc.co.uk': 8,
+    'downloads.bbc.co.uk': 4,
+}
+
+
+class HttpClient:
+    """共享的 keep-alive 连接池，列表页、文章页和资源下载复用同一个 Session"""
+
+    def __init__(self, headers: dict, per_host: int = 1,
+                 pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = 4,
+                 rate_limiter=None):
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.host_limiter = HostLimiter(per_host)
+        self.rate_limiter = rate_limiter  # 为 None 时不限速
+
+        pool_sizes = DEFAULT_POOL_SIZES if pool_sizes is None else pool_sizes
+        self._adapters = []
+        default_adapter = self._make_adapter(max(default_pool_size, per_host))
+        self.session.mount('http://', default_adapter)
+        self.session.mount('https://', default_adapter)
+        for host, size in pool_sizes.items():
+            adapter = self._make_adapter(max(size, per_host))
+            self.session.mount(f'http://{host}/', adapter)
+            self.session.mount(f'https://{host}/', adapter)
+
+    def _make_adapter(self, pool_size: int) -> HTTPAdapter:
+        # pool_block=True: 连接数达到上限时等待空闲连接，而不是额外新建后丢弃
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, pool_block=True)
+        self._adapters.append(adapter)
+        return adapter
+
+    def _send(self, url: str, timeout: int, **kwargs) -> requests.Response:
+        """经过限速器发送请求，并把状态码和延迟反馈给限速器"""
+        host = urlsplit(url).netloc
+        if self.rate_limiter:
+            with THROTTLE_SECONDS.labels(host).time():
+                self.rate_limiter.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            HTTP_REQUESTS.labels(host, 'error').inc()
+            if self.rate_limiter:
+                self.rate_limiter.observe(url, None, time.perf_counter() - start)
+            raise
+        HTTP_REQUESTS.labels(host, response.status_code).inc()
+        if self.rate_limiter:
+            self.rate_limiter.observe(url, response.status_code, time.perf_counter() - start)
+        return response
+
+    def get(self, url: str, timeout: int, **kwargs) -> requests.Response:
+        """发送GET请求，同一主机的并发数受 host_limiter 限制"""
+        with self.host_limiter.limit(url):
+            return self._send(url, timeout, **kwargs)
+
+    @contextmanager
+    def stream(self, url: str, timeout: int, **kwargs):
+        """流式GET请求，响应体读完并关闭之前一直占用该主机的并发额度"""
+        with self.host_limiter.limit(url):
+            response = self._send(url, timeout, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def connection_stats(self) -> Dict[str, dict]:
+        """按主机统计新建连接数和复用连接数"""
+        stats: Dict[str, dict] = {}
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host_stats = stats.setdefault(pool.host, {'requests': 0, 'new': 0, 'reused': 0})
+                host_stats['requests'] += pool.num_requests
+                host_stats['new'] += pool.num_connections
+        for host_stats in stats.values():
+            host_stats['reused'] = max(0, host_stats['requests'] - host_stats['new'])
+        return stats
+
+    def log_stats(self, logger):
+        for host, host_stats in self.connection_stats().items():
+            logger.info(f"连接统计 {host}: 请求 {host_stats['requests']} 次，"
+                        f"新建连接 {host_stats['new']} 个，复用连接 {host_stats['reused']} 次")
+        if self.rate_limiter:
+            self.rate_limiter.log_stats(logger)
+
+    def close(self):
+        self.session.close()
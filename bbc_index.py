@@ -0,0 +1,251 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, TextIO
+
+from bbc_categories import CATEGORIES
+from bbc_manifest import WRITTEN, OutputManifest
+
+
+def index_path(category: str) -> str:
+    """分类索引文件路径（给 App 使用的旧格式，缩进的 JSON 数组）"""
+    return os.path.join('output', f'{category}_articles.json')
+
+
+def jsonl_index_path(category: str) -> str:
+    """分类索引文件路径（每行一篇文章的 JSONL）"""
+    return os.path.join('output', f'{category}_articles.jsonl')
+
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """逐个解析 JSON 数组中的对象，不把整个文件读入内存
+
+    缓冲区中只保留还没有解析的部分，内存占用取决于单篇文章的大小而不是文件大小。
+    数组元素必须是对象；格式错误时抛出 ValueError。
+    """
+    buffer = ''
+    while not buffer:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer = chunk.lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('索引文件不是 JSON 数组')
+    pos = 1
+    eof = False
+    expect_comma = after_comma = False
+    while True:
+        # 跳过空白和分隔符，缓冲区用完时继续读取
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(chunk_size), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            raise ValueError('JSON 数组没有结束')
+        if buffer[pos] == ']':
+            if after_comma:
+                raise ValueError('JSON 数组末尾多了逗号')
+            return
+        if expect_comma:
+            if buffer[pos] != ',':
+                raise ValueError(f'JSON 数组中缺少逗号: {buffer[pos:pos + 20]!r}')
+            pos += 1
+            expect_comma, after_comma = False, True
+            continue
+
+        # 当前对象可能跨越多个块：解析失败且还有数据时读入下一块再试
+        while True:
+            try:
+                article, end = _decoder.raw_decode(buffer, pos)
+                break
+            except ValueError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+        if not isinstance(article, dict):
+            raise ValueError('JSON 数组的元素不是对象')
+        yield article
+        pos = end
+        expect_comma, after_comma = True, False
+
+
+def iter_index_file(path: str) -> Iterator[dict]:
+    """逐条读取索引文件中的文章，内存占用与文件大小无关
+
+    .jsonl 逐行读取，忽略崩溃时写了一半的最后一行；其他文件按旧格式的 JSON 数组逐个对象解析。
+    文件损坏时抛出 ValueError。调用方会把结果当作完整的索引（同步时删除索引中没有的文章），
+    所以不能只返回损坏位置之前的部分。
+    """
+    if not os.path.exists(path):
+        return
+    if not path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                yield from iter_json_array(f)
+            except ValueError as e:
+                raise ValueError(f'索引文件损坏 {path}: {e}') from e
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                # 只有没有换行符的最后一行可能是崩溃时写了一半的，其他位置的坏行说明文件已损坏
+                if not line.endswith('\n'):
+                    return
+                raise ValueError(f'索引文件损坏 {path} 第 {number} 行: {e}') from e
+
+
+def legacy_chunks(articles: Iterable[dict]) -> Iterator[str]:
+    """逐篇生成旧格式的 JSON 数组，拼接结果与 json.dumps(articles, ensure_ascii=False, indent=4) 相同"""
+    first = True
+    for article in articles:
+        body = json.dumps(article, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+        yield ('[\n    ' if first else ',\n    ') + body
+        first = False
+    yield '[]' if first else '\n]'
+
+
+class ArticleIndex:
+    """以 JSONL 保存的分类索引，每行一篇文章，文件中每个 article_id 只出现一次
+
+    新文章用一次 write 追加到文件末尾并立即落盘；需要修改已有文章时整体重写到临时文件再替换，
+    读取方不会看到写了一半的文件。
+    """
+
+    def __init__(self, category: str):
+        self.category = category
+        self.path = jsonl_index_path(category)
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def __iter__(self) -> Iterator[dict]:
+        """逐条读取文章；还没有 JSONL 索引时读取旧格式的索引"""
+        return iter_index_file(self.path if self.exists() else index_path(self.category))
+
+    def ids(self) -> set:
+        return {article['article_id'] for article in self}
+
+    def append(self, articles: List[dict]):
+        """把文章追加到索引末尾，所有行在一次 write 中写入"""
+        if not articles:
+            return
+        data = ''.join(json.dumps(article, ensure_ascii=False) + '\n' for article in articles)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # 上次崩溃留下的半行先截掉，否则追加后它会变成文件中间的坏行
+                size = os.fstat(fd).st_size
+                complete = self._complete_size(size)
+                if complete < size:
+                    os.ftruncate(fd, complete)
+                os.write(fd, data.encode('utf-8'))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _complete_size(self, size: int, block_size: int = 1 << 16) -> int:
+        """去掉最后一个换行符之后的内容（写了一半的行）后的文件长度"""
+        with open(self.path, 'rb') as f:
+            end = size
+            while end > 0:
+                start = max(0, end - block_size)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    return start + newline + 1
+                end = start
+        return 0
+
+    def rewrite(self, articles: Iterable[dict]):
+        """用 articles 替换整个索引"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for article in articles:
+                    f.write(json.dumps(article, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+def load_index(category: str) -> List[dict]:
+    """读取已有的分类索引，不存在时返回空列表，损坏时抛出 ValueError"""
+    return list(ArticleIndex(category))
+
+
+def keep_stable_fields(existing: List[dict], new: List[dict],
+                       fields=('update_time', 'views')) -> List[dict]:
+    """已在索引中的文章沿用原来的 update_time 和 views，重新爬取未变化的文章时索引内容不变"""
+    existing_by_id: Dict[str, dict] = {article['article_id']: article for article in existing}
+    stable = []
+    for article in new:
+        old = existing_by_id.get(article['article_id'])
+        if old:
+            article = dict(article, **{field: old[field] for field in fields if field in old})
+        stable.append(article)
+    return stable
+
+
+def merge_articles(existing: List[dict], new: List[dict]) -> List[dict]:
+    """按 article_id 合并，已有文章保持原顺序，新文章追加在后面"""
+    new_by_id: Dict[str, dict] = {article['article_id']: article for article in new}
+    merged = [new_by_id.pop(article['article_id'], article) for article in existing]
+    merged.extend(article for article in new if article['article_id'] in new_by_id)
+    return merged
+
+
+def export_legacy(category: str, manifest=None) -> str:
+    """从 JSONL 索引逐篇导出旧格式的缩进 JSON 数组，返回写入结果
+
+    manifest 不为空时内容没有变化就不重写文件。
+    """
+    chunks = legacy_chunks(iter_index_file(jsonl_index_path(category)))
+    if manifest is not None:
+        return manifest.write_chunks(index_path(category), chunks)
+    with open(index_path(category), 'w', encoding='utf-8') as f:
+        f.writelines(chunks)
+    return WRITTEN
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从 JSONL 索引导出 App 使用的旧格式 JSON 数组')
+    parser.add_argument('categories', nargs='*', help='要导出的栏目，默认全部')
+    parser.add_argument('--import-legacy', action='store_true',
+                        help='先把已有的旧格式索引转换为 JSONL（会覆盖已有的 JSONL 索引）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+    for category in args.categories or list(CATEGORIES):
+        index = ArticleIndex(category)
+        if args.import_legacy and os.path.exists(index_path(category)):
+            index.rewrite(iter_index_file(index_path(category)))
+            logger.info(f"已转换为 JSONL: {index.path}")
+        if not index.exists():
+            logger.warning(f"没有 JSONL 索引: {index.path}")
+            continue
+        manifest = OutputManifest(category)
+        status = export_legacy(category, manifest)
+        manifest.save()
+        logger.info(f"{category}: {index_path(category)} {status}")
+
+
+if __name__ == "__main__":
+    main()
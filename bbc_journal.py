@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+from typing import Dict, List
+
+
+# 每篇文章依次经过的状态
+LISTED = 'listed'
+FETCHED = 'fetched'
+ASSETS_DONE = 'assets_done'
+HTML_WRITTEN = 'html_written'
+
+
+class CrawlJournal:
+    """只追加的爬取日志（JSONL），每行记录一篇文章进入的新状态
+
+    进程崩溃后最多丢失正在写的最后一行，--resume 时据此跳过已完成的文章，
+    并从日志重建最终的文章索引。
+    """
+
+    def __init__(self, category: str, output_dir: str = 'output'):
+        self.path = os.path.join(output_dir, f'{category}_journal.jsonl')
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """开始一次全新的爬取，清空旧日志"""
+        with self._lock:
+            open(self.path, 'w', encoding='utf-8').close()
+
+    def record(self, article_id: str, state: str, **data):
+        """追加一条状态记录并立即落盘"""
+        line = json.dumps(dict(article_id=article_id, state=state, **data), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self) -> Dict[str, dict]:
+        """读取每篇文章已到达的状态集合 states，忽略崩溃时写了一半的行
+
+        资源下载和HTML写入并行进行，ASSETS_DONE 和 HTML_WRITTEN 的先后顺序不固定。
+        """
+        entries: Dict[str, dict] = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                entry = entries.setdefault(record['article_id'], {'states': set()})
+                if record['state'] == LISTED:
+                    # 重新登记表示重新开始处理这篇文章
+                    entry['states'] = set()
+                entry['states'].add(record['state'])
+                entry.update(record)
+        return entries
+
+    def completed_ids(self) -> set:
+        """HTML已写入且资源全部下载完成的文章"""
+        return {article_id for article_id, entry in self.load().items()
+                if {HTML_WRITTEN, ASSETS_DONE} <= entry['states']}
+
+    def articles(self, article_ids: List[str]) -> List[dict]:
+        """按 article_ids 的顺序返回HTML已写入的文章信息"""
+        entries = self.load()
+        return [entries[article_id]['article'] for article_id in article_ids
+                if HTML_WRITTEN in entries.get(article_id, {}).get('states', ())]
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+
+# 每次写文件的结果
+WRITTEN = 'written'  # 新文件
+CHANGED = 'changed'  # 内容有变化，已覆盖
+SKIPPED = 'skipped'  # 内容相同，没有写
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return content_hash(f.read())
+
+
+class OutputManifest:
+    """记录每个输出文件的内容哈希，内容没有变化时不重写文件
+
+    输出目录直接发布到 GitHub Pages，跳过未变化的文件可以避免每次部署都上传全部文件。
+    清单中没有记录的已有文件按磁盘上的内容比较，第一次启用时也不会全部重写。
+    """
+
+    def __init__(self, category: str, output_dir: str = 'output'):
+        self.path = os.path.join(output_dir, f'{category}_manifest.json')
+        self._hashes: Dict[str, str] = self._load()
+        self.counts = Counter()  # WRITTEN / CHANGED / SKIPPED -> 文件数
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, str]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def stored_hash(self, path: str) -> Optional[str]:
+        """文件上次写入时的哈希；清单中没有时读取磁盘上的文件"""
+        key = os.path.normpath(path)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None or not os.path.exists(path):
+            digest = file_hash(path)
+        return digest
+
+    def update(self, path: str, digest: str, status: str):
+        """记录一次写入的结果，用于在别处（例如子进程）完成比较和写入的情况"""
+        with self._lock:
+            self._hashes[os.path.normpath(path)] = digest
+            self.counts[status] += 1
+
+    def write_text(self, path: str, content: str) -> str:
+        """内容与上次不同时才写入 path，返回 WRITTEN / CHANGED / SKIPPED"""
+        data = content.encode('utf-8')
+        digest = content_hash(data)
+        previous = self.stored_hash(path)
+        if previous == digest:
+            status = SKIPPED
+        else:
+            status = WRITTEN if previous is None else CHANGED
+            with open(path, 'wb') as f:
+                f.write(data)
+        self.update(path, digest, status)
+        return status
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> str:
+        """逐块写入临时文件并计算哈希，内容与上次不同时才替换 path，不在内存中拼接整个文件"""
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        sha256 = hashlib.sha256()
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                sha256.update(data)
+                f.write(data)
+        digest = sha256.hexdigest()
+        previous = self.stored_hash(path)
+        if previous == digest:
+            os.remove(tmp_path)
+            status = SKIPPED
+        else:
+            os.replace(tmp_path, path)
+            status = WRITTEN if previous is None else CHANGED
+        self.update(path, digest, status)
+        return status
+
+    def save(self):
+        with self._lock:
+            hashes = dict(sorted(self._hashes.items()))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(hashes, f, ensure_ascii=False, indent=4)
+
+    def log_stats(self, logger):
+        logger.info(f"输出文件: 新写入 {self.counts[WRITTEN]}，内容变化 {self.counts[CHANGED]}，"
+                    f"未变化跳过 {self.counts[SKIPPED]}（{self.path}）")
@@ -0,0 +1,274 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 秒，覆盖从写入一个文件（亚毫秒级）到下载一个大文件（分钟级）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """按标签值分组的指标，labels(...) 返回对应的子指标，调用方可以保存起来重复使用"""
+
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        """(标签值, 子指标) 列表，按标签值排序"""
+        with self._lock:
+            return sorted(self._children.items())
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        """进入时加一，退出时减一"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Counter(_Metric):
+    """只增不减的计数，例如字节数和错误数"""
+
+    type = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}'
+                for key, child in self.children()]
+
+
+class Gauge(Counter):
+    """可增可减的当前值，例如正在进行的请求数"""
+
+    type = 'gauge'
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """按分桶线性插值估计分位数（与 histogram_quantile 相同），落在 +Inf 桶时返回最大的有限边界"""
+        with self._lock:
+            counts = list(self.counts)
+        rank = q * sum(counts)
+        cumulative, lower = 0, 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """耗时分布，导出为 Prometheus 的累计分桶"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in self.children():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ['+Inf'], counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == '+Inf' else f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        return ''.join(metric.render() + '\n' for metric in self.metrics)
+
+    def write_textfile(self, path: str):
+        """原子地写出文本文件，供 node_exporter 的 textfile collector 读取"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+# 爬虫各阶段的指标，标签中的 stage 见 BBCLearningEnglishScraper
+STAGE_SECONDS = Histogram('bbc_stage_seconds', '爬虫各阶段的耗时（秒）', ('category', 'stage'))
+IN_FLIGHT = Gauge('bbc_in_flight', '正在进行中的文章和资源下载数', ('category', 'stage'))
+ASSET_QUEUE = Gauge('bbc_asset_queue_depth', '资源下载阶段已提交但还没完成的下载数（所有栏目共用）')
+BYTES = Counter('bbc_bytes_total', '下载的字节数', ('category', 'kind'))
+ARTICLES = Counter('bbc_articles_total', '处理完的文章数', ('category', 'status'))
+RETRIES = Counter('bbc_retries_total', '失败后重试的次数', ('category', 'kind'))
+FAILURES = Counter('bbc_failures_total', '重试用尽后仍然失败的请求数', ('category', 'kind'))
+HTTP_REQUESTS = Counter('bbc_http_requests_total', 'HTTP请求数', ('host', 'status'))
+THROTTLE_SECONDS = Histogram('bbc_throttle_wait_seconds', '请求前在限速器中等待的时间（秒）', ('host',))
+RATE_LIMIT = Gauge('bbc_rate_limit_rps', '限速器当前允许的速率（请求/秒）', ('host',))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """爬取期间导出指标：port 不为空时在本机提供 /metrics，textfile 不为空时每 interval 秒写一次文件"""
+
+    def __init__(self, port: Optional[int] = None, textfile: Optional[str] = None,
+                 interval: float = 15.0, registry: Registry = REGISTRY):
+        self.port = port
+        self.textfile = textfile
+        self.interval = interval
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def start(self) -> 'MetricsExporter':
+        if self.port is not None:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.registry = self.registry
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logger.info(f"指标地址: http://127.0.0.1:{self._server.server_address[1]}/metrics")
+        if self.textfile:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_textfile(self.textfile)
+
+    def stop(self):
+        """停止导出，并写出最终的指标文件"""
+        self._stop.set()
+        if self._writer:
+            self._writer.join()
+            self.registry.write_textfile(self.textfile)
+            logger.info(f"指标已写入: {self.textfile}")
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,139 @@
+import argparse
+import glob
+import logging
+import re
+import time
+import tracemalloc
+from typing import Callable, Iterable, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+
+DEFAULT_PARSER = 'html.parser'
+# lxml 是C实现的解析器，比纯Python的 html.parser 快数倍，需要 pip install lxml
+FAST_PARSER = 'lxml'
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_parser(name: Optional[str]) -> str:
+    """返回可用的解析器名称，所需的库没有安装时退回 html.parser"""
+    name = name or DEFAULT_PARSER
+    if builder_registry.lookup(name) is None:
+        logger.warning(f"解析器 {name} 不可用，改用 {DEFAULT_PARSER}")
+        return DEFAULT_PARSER
+    return name
+
+
+def parse_html(content, parser: str = DEFAULT_PARSER,
+               parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """用指定的解析器后端解析页面，parse_only 不为空时只构建匹配的子树"""
+    return BeautifulSoup(content, parser, parse_only=parse_only)
+
+
+def normalize_html(html: str) -> str:
+    """去掉标签之间和文本中多余的空白，用于比较不同解析器的输出"""
+    html = re.sub(r'>\s+<', '><', html)
+    return re.sub(r'\s+', ' ', html).strip()
+
+
+def verify_parser(paths: Iterable[str], parser: str, render: Callable[[bytes, str], str]) -> bool:
+    """用 html.parser 和 parser 分别渲染每个页面并比较结果
+
+    render(content, parser) 返回爬取时会写入文件的HTML。结果逐字节相同或规范化后相同都算通过。
+    """
+    identical = normalized = different = 0
+    reference_time = candidate_time = 0.0
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        start = time.perf_counter()
+        reference = render(content, DEFAULT_PARSER)
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidate = render(content, parser)
+        candidate_time += time.perf_counter() - start
+
+        if candidate == reference:
+            identical += 1
+        elif normalize_html(candidate) == normalize_html(reference):
+            normalized += 1
+        else:
+            different += 1
+            logger.error(f"输出不一致: {path}")
+
+    total = identical + normalized + different
+    logger.info(f"{parser} 对比 {DEFAULT_PARSER}: {total} 个页面，逐字节相同 {identical}，"
+                f"规范化后相同 {normalized}，不同 {different}")
+    if total:
+        logger.info(f"平均耗时: {DEFAULT_PARSER} {reference_time / total * 1000:.1f}ms，"
+                    f"{parser} {candidate_time / total * 1000:.1f}ms")
+    return different == 0
+
+
+def _measure(func: Callable[[], object]):
+    """返回 (结果, 耗时秒数, 内存峰值字节数)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_strainer(paths: Iterable[str], parser: str, parse_only: SoupStrainer,
+                       target: Callable[[BeautifulSoup], object]) -> bool:
+    """对比整页解析和只解析 parse_only 子树的耗时与内存峰值
+
+    target(soup) 取出需要的子树，两种方式取出的子树必须完全相同。
+    """
+    count = mismatched = 0
+    full_time = partial_time = 0.0
+    full_peak = partial_peak = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        full, elapsed, peak = _measure(lambda: target(parse_html(content, parser)))
+        full_time += elapsed
+        full_peak = max(full_peak, peak)
+        partial, elapsed, peak = _measure(lambda: target(parse_html(content, parser, parse_only)))
+        partial_time += elapsed
+        partial_peak = max(partial_peak, peak)
+        count += 1
+        if str(full) != str(partial):
+            mismatched += 1
+            logger.error(f"子树不一致: {path}")
+
+    if count:
+        logger.info(f"{count} 个页面 ({parser})，平均解析耗时: 整页 {full_time / count * 1000:.1f}ms，"
+                    f"只解析文章 {partial_time / count * 1000:.1f}ms")
+        logger.info(f"内存峰值: 整页 {full_peak / 1024:.0f}KB，只解析文章 {partial_peak / 1024:.0f}KB")
+    return mismatched == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='验证解析器后端的输出与 html.parser 一致，或测试只解析文章子树的收益')
+    parser.add_argument('--parser', default=FAST_PARSER, help='要验证的解析器后端')
+    parser.add_argument('--benchmark', action='store_true', help='对比整页解析和只解析文章子树')
+    parser.add_argument('--pretty', action='store_true', help='按 prettify() 的缩进格式比较，与爬取时的 pretty 设置一致')
+    parser.add_argument('pages', nargs='*', default=['take-away-english/*.html'], help='已保存的页面')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from bbc_scraper import ARTICLE_ONLY, find_article, render_article
+
+    paths = sorted(path for pattern in args.pages for path in glob.glob(pattern))
+    if args.benchmark:
+        ok = benchmark_strainer(paths, resolve_parser(args.parser), ARTICLE_ONLY, find_article)
+    else:
+        ok = verify_parser(paths, resolve_parser(args.parser),
+                           lambda content, parser: render_article(content, parser, args.pretty))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
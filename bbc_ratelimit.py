@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from bbc_metrics import RATE_LIMIT
+
+
+# 视为服务器限流的状态码
+THROTTLE_STATUS = (429, 503)
+
+
+class TokenBucket:
+    """令牌桶：平均每秒 rate 个请求，最多攒 capacity 个令牌用于突发"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """取一个令牌，不够时阻塞到轮到自己为止"""
+        with self._lock:
+            self._refill()
+            # 先预扣令牌再在锁外等待，多个线程按到达顺序排队
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """在接下来的 seconds 秒内不再发放令牌"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+class AdaptiveRateLimiter:
+    """按主机分别限速的自适应限速器
+
+    响应正常且延迟稳定时线性提速；遇到 429/503 或延迟明显升高时成倍降速。
+    任何实现了 acquire(url) 和 observe(url, status_code, latency) 的对象都可以替换它。
+    """
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 burst: float = 2, increase: float = 0.1, decrease: float = 0.5,
+                 latency_factor: float = 2.0, host_rates: Optional[Dict[str, float]] = None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor  # 延迟超过基线的倍数时视为服务器变慢
+        self.host_rates = host_rates or {}  # 各主机的初始速率
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._latency: Dict[str, float] = {}  # 各主机延迟的指数滑动平均
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.host_rates.get(host, self.initial_rate)
+                self._buckets[host] = TokenBucket(rate, self.burst)
+                RATE_LIMIT.labels(host).set(rate)
+            return self._buckets[host]
+
+    def acquire(self, url: str):
+        self._bucket(urlparse(url).netloc).acquire()
+
+    def observe(self, url: str, status_code: Optional[int], latency: float):
+        """根据一次请求的结果调整该主机的速率，status_code 为 None 表示请求异常"""
+        host = urlparse(url).netloc
+        bucket = self._bucket(host)
+        with self._lock:
+            baseline = self._latency.get(host, latency)
+            self._latency[host] = 0.8 * baseline + 0.2 * latency
+
+        if status_code is None or status_code in THROTTLE_STATUS:
+            rate = bucket.rate * self.decrease
+        elif latency > baseline * self.latency_factor:
+            rate = bucket.rate * (1 + self.decrease) / 2
+        else:
+            rate = bucket.rate + self.increase
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        bucket.set_rate(rate)
+        RATE_LIMIT.labels(host).set(rate)
+
+    def pause(self, url: str, seconds: float):
+        """暂停向该主机发请求，例如服务器返回了 Retry-After"""
+        self._bucket(urlparse(url).netloc).pause(seconds)
+
+    def rates(self) -> Dict[str, float]:
+        """各主机当前的速率（请求/秒）"""
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
+
+    def log_stats(self, logger):
+        for host, rate in self.rates().items():
+            logger.info(f"当前限速 {host}: {rate:.2f} 请求/秒")
@@ -0,0 +1,87 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bbc_categories import CATEGORIES
+from bbc_manifest import CHANGED, SKIPPED, WRITTEN, OutputManifest, content_hash
+from bbc_parser import FAST_PARSER
+from bbc_scraper import render_page
+from bbc_snapshot import SnapshotStore
+
+
+logger = logging.getLogger(__name__)
+
+
+def html_path(category: str, article_id: str) -> str:
+    return os.path.join(category, f'{article_id}.html')
+
+
+def rebuild_one(task: Tuple[str, dict, str, str, bool, Optional[str]]) -> Tuple[str, str, Optional[str], str]:
+    """在子进程中从快照重新生成一篇文章的HTML
+
+    previous 是清单中该文件的哈希，相同时不重写。返回 (栏目, article_id, 新哈希, 写入结果)，
+    找不到文章内容时新哈希为 None。
+    """
+    category, ref, parser, snapshot_root, pretty, previous = task
+    content = SnapshotStore(snapshot_root).get(ref['sha256'])
+    page = render_page(category, parser, content, ref['url'], pretty)
+    if not page:
+        return category, ref['article_id'], None, SKIPPED
+    data = page.html.encode('utf-8')
+    digest = content_hash(data)
+    if digest == previous:
+        return category, ref['article_id'], digest, SKIPPED
+    os.makedirs(category, exist_ok=True)
+    with open(html_path(category, page.base_name), 'wb') as f:
+        f.write(data)
+    return category, ref['article_id'], digest, WRITTEN if previous is None else CHANGED
+
+
+def rebuild(categories: List[str], workers: int = None, parser: str = FAST_PARSER,
+            snapshot_root: str = 'snapshots', pretty: bool = False) -> Dict[str, int]:
+    """用进程池从本地快照重新生成所有HTML，不访问网络。返回 栏目 -> 生成的文章数"""
+    store = SnapshotStore(snapshot_root)
+    manifests = {category: OutputManifest(category) for category in categories}
+    tasks = [(category, ref, parser, snapshot_root, pretty,
+              manifests[category].stored_hash(html_path(category, ref['article_id'])))
+             for category in categories for ref in store.refs(category)]
+    logger.info(f"从快照重新生成 {len(tasks)} 篇文章")
+
+    counts = {category: 0 for category in categories}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for category, article_id, digest, status in pool.map(rebuild_one, tasks, chunksize=16):
+            if digest:
+                counts[category] += 1
+                manifests[category].update(html_path(category, article_id), digest, status)
+            else:
+                logger.error(f"找不到文章内容: {category}/{article_id}")
+    elapsed = time.perf_counter() - start
+    logger.info(f"重新生成完成，耗时 {elapsed:.1f}秒")
+    for manifest in manifests.values():
+        manifest.save()
+        manifest.log_stats(logger)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从本地快照重新生成所有栏目的HTML，不访问网络')
+    parser.add_argument('categories', nargs='*', default=list(CATEGORIES), help='要重新生成的栏目')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--parser', default=FAST_PARSER, help='解析器后端')
+    parser.add_argument('--snapshots', default='snapshots', help='快照目录')
+    parser.add_argument('--pretty', action='store_true', help='输出 prettify() 的缩进格式，便于调试')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    counts = rebuild(args.categories, workers=args.workers, parser=args.parser, snapshot_root=args.snapshots,
+                     pretty=args.pretty)
+    for category, count in counts.items():
+        print(f"{category}: {count} 篇文章")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, TypeVar
+
+import requests
+
+from bbc_download import IncompleteDownload
+from bbc_metrics import FAILURES, RETRIES, STAGE_SECONDS
+
+
+T = TypeVar('T')
+
+# 可以重试的HTTP状态码
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# 各类请求的最大尝试次数
+DEFAULT_BUDGETS = {
+    'list': 5,
+    'article': 4,
+    'image': 3,
+    'pdf': 3,
+    'mp3': 5,
+    'mp4': 5,
+}
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """解析 Retry-After 响应头，支持秒数和HTTP日期两种格式"""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """带抖动的指数退避重试，每类请求有自己的尝试次数"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, base_delay: float = 1.0,
+                 max_delay: float = 60.0, rate_limiter=None, logger=None, category: str = ''):
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self.category = category  # 指标的标签
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = rate_limiter  # 收到 Retry-After 时暂停该主机
+        self.logger = logger
+
+    def is_retriable(self, error: Exception) -> bool:
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUS
+        # 连接错误、超时、读到一半断开，以及下载大小不符；磁盘写满、没有权限等本地错误重试也没用
+        return isinstance(error, (requests.RequestException, IncompleteDownload))
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """第 attempt 次失败后的等待时间：full jitter 指数退避，服务器给了 Retry-After 时以它为准"""
+        retry_after = retry_after_seconds(getattr(error, 'response', None))
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, kind: str, url: str, func: Callable[[], T]) -> T:
+        """执行 func，可重试的错误在 kind 对应的次数内重试，最后一次的错误原样抛出"""
+        attempts = self.budgets.get(kind, 1)
+        for attempt in range(1, attempts + 1):
+            try:
+                return func()
+            except Exception as e:
+                if attempt >= attempts or not self.is_retriable(e):
+                    raise
+                wait = self.delay(attempt, e)
+                if self.rate_limiter and retry_after_seconds(getattr(e, 'response', None)) is not None:
+                    self.rate_limiter.pause(url, wait)
+                if self.logger:
+                    self.logger.warning(f"请求失败，{wait:.1f}秒后第 {attempt + 1}/{attempts} 次尝试 {url}: {str(e)}")
+                RETRIES.labels(self.category, kind).inc()
+                STAGE_SECONDS.labels(self.category, 'retry_sleep').observe(wait)
+                time.sleep(wait)
+
+
+class FailureLog:
+    """记录重试用尽后仍然失败的请求，供 --retry-failed 只重跑这些文章"""
+
+    def __init__(self, category: str, output_dir: str = 'output'):
+        self.category = category
+        self.path = os.path.join(output_dir, f'{category}_failures.json')
+        self._failures = []
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, url: str, article_id: str, error: Exception):
+        FAILURES.labels(self.category, kind).inc()
+        with self._lock:
+            self._failures.append({
+                'kind': kind,
+                'url': url,
+                'article_id': article_id,
+                'error': str(error),
+            })
+
+    def save(self, logger=None):
+        """写出本次的失败列表，没有失败时删除旧文件"""
+        with self._lock:
+            failures = list(self._failures)
+        if not failures:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(failures, f, ensure_ascii=False, indent=4)
+        if logger:
+            logger.warning(f"{len(failures)} 个请求最终失败，已记录到: {self.path}")
+
+    def load_ids(self) -> set:
+        """上次运行失败的文章ID"""
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return {failure['article_id'] for failure in json.load(f) if failure['article_id']}
@@ -0,0 +1,740 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import os
+import logging
+from typing import Dict, Optional, List
+from urllib.parse import urljoin
+import random
+from datetime import datetime
+from dataclasses import dataclass, asdict, field
+import re
+import argparse
+import time
+import io
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from bbc_async import AssetStage, crawl_articles
+from bbc_categories import CATEGORIES, CategoryConfig
+from bbc_cleaner import DomCleaner
+from bbc_download import format_rate, stream_download
+from bbc_http import HttpClient
+from bbc_index import ArticleIndex, export_legacy, index_path, keep_stable_fields, load_index, merge_articles
+from bbc_journal import ASSETS_DONE, FETCHED, HTML_WRITTEN, LISTED, CrawlJournal
+from bbc_manifest import SKIPPED, OutputManifest
+from bbc_metrics import ARTICLES, BYTES, IN_FLIGHT, STAGE_SECONDS, MetricsExporter
+from bbc_parser import DEFAULT_PARSER, FAST_PARSER, parse_html, resolve_parser
+from bbc_ratelimit import AdaptiveRateLimiter
+from bbc_retry import FailureLog, RetryPolicy
+from bbc_serializer import write_compact
+from bbc_snapshot import SnapshotStore
+
+
+# 列表页和文章页只构建需要的子树，跳过导航、页脚和脚本
+LIST_CLASS = 'widget widget-bbcle-coursecontentlist widget-bbcle-coursecontentlist-standard widget-progress-enabled'
+LIST_ONLY = SoupStrainer('div', class_=LIST_CLASS)
+ARTICLE_ONLY = SoupStrainer('div', attrs={'role': 'article'})
+
+# 文章中需要删除的部分
+ELEMENTS_TO_REMOVE = [
+    ('div', {'class': 'widget widget-pagelink widget-pagelink-next-activity'}),
+    ('div', {'class': 'widget widget-list widget-list-automatic'}),
+    ('div', {'class': 'clearfix'}),
+    ('div', {'class': 'widget widget-bbcle-featuresubheader'}),
+    ('div', {'id': 'heading-'}),
+    ('div', {'class': 'widget-container widget-container-right'})
+]
+ARTICLE_CLEANER = DomCleaner(ELEMENTS_TO_REMOVE)
+
+# 生成的页面模板，文章内容写在两者之间
+HTML_HEAD = """
+<!DOCTYPE html>
+<html lang="zh">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <link rel="stylesheet" href="./style.css">
+</head>
+<body>
+    """
+HTML_TAIL = """
+    <script src="./script.js"></script>
+</body>
+</html>
+"""
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+@dataclass
+class ArticleInfo:
+    """文章信息数据类"""
+    article_id:str
+    url: str
+    title: str  # 格式: title_en=title_cn
+    cover: str  # 封面图片地址
+    mp3_url: str
+    pdf_url: str
+    update_time: str
+    views: int
+    category: str = "take-away-english"  # 添加默认值
+    mp4_url: Optional[str] = None  # 只有白领英语有
+
+def article_record(article_info: ArticleInfo) -> dict:
+    """转换为索引中的字典，字段顺序与原来各栏目脚本的输出一致"""
+    record = asdict(article_info)
+    mp4_url = record.pop('mp4_url')
+    if mp4_url is None:
+        return record
+    # 白领英语的索引中 mp4_url 紧跟在 mp3_url 后面
+    ordered = {}
+    for key, value in record.items():
+        ordered[key] = value
+        if key == 'mp3_url':
+            ordered['mp4_url'] = mp4_url
+    return ordered
+
+def find_article(soup: BeautifulSoup):
+    return soup.find('div', {'role': 'article'})
+
+def render_article(content: bytes, parser: str = DEFAULT_PARSER, pretty: bool = False,
+                   category: str = 'take-away-english', url: str = '') -> str:
+    """用爬取时相同的渲染路径生成HTML，返回会写入文件的内容；不下载资源，找不到文章时返回空字符串"""
+    page = render_page(category, parser, content, url, pretty)
+    return page.html if page else ""
+
+@dataclass
+class RenderedPage:
+    """render 的结果：生成的HTML和待下载的资源"""
+    base_name: str
+    html: str
+    downloads: List[tuple]  # (资源URL, 保存路径)
+    removed: Counter  # 清理规则 -> 删除的节点数
+    timings: Dict[str, float] = field(default_factory=dict)  # parse/clean/serialize -> 秒，在解析进程中测量
+
+class ArticleRenderer:
+    """把文章页面转换成本地HTML：解析、改写图片地址、清理、生成HTML
+
+    不访问网络，既用于在线爬取，也用于从快照离线重新生成。
+    """
+
+    def __init__(self, category: str = 'take-away-english', parser: str = DEFAULT_PARSER,
+                 pretty: bool = False):
+        self.config: CategoryConfig = CATEGORIES[category]
+        self.category = category
+        self.base_output_dir = category
+        self.parser = resolve_parser(parser)  # BeautifulSoup 解析器后端
+        self.pretty = pretty  # True时用 prettify() 输出缩进格式，便于调试
+        # 按内容哈希跳过没有变化的HTML和索引文件，避免每次部署都上传全部文件
+        self.manifest = OutputManifest(category)
+        self.index = ArticleIndex(category)
+
+    def get_cover_image_url(self, article_soup: BeautifulSoup, base_url: str) -> str:
+        """获取封面图片URL"""
+        audio_player = article_soup.find('div', class_=self.config.media_class)
+        if audio_player:
+            img = audio_player.find('img')
+            if img and img.get('src'):
+                return urljoin(base_url, img['src'])
+        return ""
+
+    def process_images(self, article_soup: BeautifulSoup, base_url: str, base_name: str,
+                       downloads: List[tuple]) -> BeautifulSoup:
+        """处理封面容器中的图片，将src改为与cover相同的格式，图片加入 downloads 待下载"""
+        audio_player = article_soup.find('div', class_=self.config.media_class)
+        if audio_player:
+            img = audio_player.find('img')
+            if img and img.get('src'):
+                img_url = urljoin(base_url, img['src'])
+                img_filename = f"{base_name}.jpg"
+                img_path = os.path.join(self.base_output_dir, 'img', img_filename)
+                
+                downloads.append((img_url, img_path))
+                # 修改图片src为与cover相同的URL格式，下载失败时会记入失败列表
+                img['src'] = f"https://774663576.github.io/reading_bbc/{self.base_output_dir}/img/{base_name}.jpg"
+        
+        return article_soup
+
+    def find_resource_urls(self, article_soup: BeautifulSoup, base_url: str) -> tuple[str, str]:
+        """查找PDF和MP3的URL"""
+        pdf_url = ""
+        mp3_url = ""
+        
+        download_links = article_soup.find_all('a', href=True)
+        for link in download_links:
+            href = link.get('href', '')
+            text = link.get_text().strip()
+            
+            if '文字稿' in text and '.pdf' in href.lower():
+                pdf_url = urljoin(base_url, href)
+            elif '音频' in text and ('.mp3' in href.lower() or '/download/' in href):
+                mp3_url = urljoin(base_url, href)
+        
+        return pdf_url, mp3_url
+
+    def download_resources(self, article_soup: BeautifulSoup, base_url: str, base_name: str,
+                           downloads: List[tuple]):
+        """把PDF和MP3文件加入 downloads 待下载"""
+        pdf_url, mp3_url = self.find_resource_urls(article_soup, base_url)
+        
+        if pdf_url:
+            pdf_path = os.path.join(self.base_output_dir, 'pdf', f'{base_name}.pdf')
+            downloads.append((pdf_url, pdf_path))
+            
+        if mp3_url:
+            mp3_path = os.path.join(self.base_output_dir, 'mp3', f'{base_name}.mp3')
+            downloads.append((mp3_url, mp3_path))
+
+    def write_html(self, out, article_soup: BeautifulSoup):
+        """把完整页面写入 out；紧凑模式逐个节点写出文章，不生成 prettify() 的缩进字符串"""
+        out.write(HTML_HEAD)
+        if self.pretty:
+            out.write(article_soup.prettify())
+        else:
+            write_compact(article_soup, out)
+        out.write(HTML_TAIL)
+
+    def render(self, content: bytes, url: str) -> Optional[RenderedPage]:
+        """从原始页面生成HTML，找不到文章内容时返回 None"""
+        # 解析内容
+        start = time.perf_counter()
+        soup = parse_html(content, self.parser, ARTICLE_ONLY)
+        article = find_article(soup)
+        if not article:
+            return None
+        timings = {'parse': time.perf_counter() - start}
+
+        # 从URL提取基础名称
+        base_name = url.split('/')[-1]
+
+        # 处理图片
+        downloads = []
+        article = self.process_images(article, url, base_name, downloads)
+
+        # 查找PDF和MP3
+        self.download_resources(article, url, base_name, downloads)
+
+        # 清理文章内容
+        start = time.perf_counter()
+        removed = ARTICLE_CLEANER.clean(article)
+        timings['clean'] = time.perf_counter() - start
+
+        # 生成HTML：页面要传回主进程，所以先写入内存缓冲区
+        start = time.perf_counter()
+        buffer = io.StringIO()
+        self.write_html(buffer, article)
+        timings['serialize'] = time.perf_counter() - start
+        return RenderedPage(base_name, buffer.getvalue(), downloads, removed, timings)
+
+    def save_html(self, base_name: str, html_content: str) -> str:
+        """保存HTML文件，内容没有变化时跳过，返回文件路径"""
+        file_path = os.path.join(self.base_output_dir, f'{base_name}.html')
+        self.manifest.write_text(file_path, html_content)
+        return file_path
+
+@lru_cache(maxsize=None)
+def _renderer(category: str, parser: str, pretty: bool) -> ArticleRenderer:
+    # 每个子进程每个栏目只创建一次
+    return ArticleRenderer(category, parser, pretty)
+
+def render_page(category: str, parser: str, content: bytes, url: str,
+                pretty: bool = False) -> Optional[RenderedPage]:
+    """在解析进程池中运行：原始页面 -> 清理后的HTML和待下载资源"""
+    return _renderer(category, parser, pretty).render(content, url)
+
+class BBCLearningEnglishScraper(ArticleRenderer):
+    def __init__(self, category: str = 'take-away-english', start_pos: int = 0, count: int = 50,
+                 concurrency: int = 1, pool_sizes: Optional[dict] = None, incremental: bool = False,
+                 resume: bool = False, rate_limiter=None, retry_failed: bool = False,
+                 retry_budgets: Optional[dict] = None, asset_workers: int = 4,
+                 http: Optional[HttpClient] = None, assets: Optional[AssetStage] = None,
+                 parser: str = DEFAULT_PARSER, snapshots: Optional[SnapshotStore] = None,
+                 parse_workers: int = 0, pretty: bool = False):
+        """初始化爬虫配置
+
+        多个栏目一起爬取时传入共享的 http、rate_limiter 和 assets，
+        所有栏目共用同一个连接池、限速器和资源下载阶段。
+        """
+        super().__init__(category, parser, pretty)
+        self.base_url = 'https://www.bbc.co.uk'
+        self.list_url = self.config.list_url
+        self.titles: Dict[str, str] = {}  # 文章URL -> 列表页上的标题
+        self.start_pos = start_pos  # 新增：起始位置
+        self.count = count  # 改名：原来的limit改为count
+        self.concurrency = concurrency  # 异步模式下每个主机的并发数
+        self.incremental = incremental  # 增量模式：只爬取索引中没有的文章，并合并到已有索引
+        self.resume = resume  # 断点续爬：跳过爬取日志中已完成的文章
+        self.journal = CrawlJournal(category)
+        self.retry_failed = retry_failed  # 只重跑上次失败列表中的文章
+        self.failures = FailureLog(category)
+        # 并发模式下解析和生成HTML交给多个进程，不受GIL限制；为0时在当前线程中解析
+        self.parse_workers = parse_workers
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        # 保存原始页面，修改清理或生成逻辑后可以用 bbc_rebuild.py 离线重新生成
+        self.snapshots = snapshots or SnapshotStore()
+        self.headers = HEADERS
+        # 按主机自适应限速，代替每篇文章之后固定的随机等待
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        # 所有请求共用一个连接池，请求头只在这里设置一次
+        self.http = http or HttpClient(self.headers, per_host=concurrency, pool_sizes=pool_sizes,
+                                       rate_limiter=self.rate_limiter)
+        
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        self.logger = logging.getLogger(__name__)
+
+        # 临时性错误按请求类型重试，用尽后记入失败列表
+        self.retry = RetryPolicy(budgets=retry_budgets, rate_limiter=self.rate_limiter, logger=self.logger,
+                                 category=category)
+
+        # 图片、PDF、MP3在独立的下载阶段进行，不阻塞下一篇文章的解析和写入
+        self.assets = assets or AssetStage(workers=asset_workers, logger=self.logger)
+        
+        # 创建输出目录
+        os.makedirs('output', exist_ok=True)
+        os.makedirs(self.base_output_dir, exist_ok=True)
+
+    def _get(self, url: str, timeout: int, kind: str = 'article'):
+        """通过共享连接池发送GET请求，失败时按 kind 对应的次数重试"""
+        def fetch():
+            response = self.http.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response
+        return self.retry.call(kind, url, fetch)
+
+    def get_article_urls(self, list_url: str) -> List[str]:
+        """获取列表页中所有文章的URL，从后往前排序并限制数量"""
+        try:
+            self.logger.info(f"正在获取列表页: {list_url}")
+            with STAGE_SECONDS.labels(self.category, 'list_fetch').time():
+                response = self._get(list_url, timeout=10, kind='list')
+            BYTES.labels(self.category, 'list').inc(len(response.content))
+            response.raise_for_status()
+            
+            soup = parse_html(response.content, self.parser, LIST_ONLY)
+            content_list = soup.find('div', class_=LIST_CLASS)
+            
+            if not content_list:
+                self.logger.error("找不到文章列表")
+                return []
+            
+            article_urls = []
+            for item in content_list.find_all('li', class_='course-content-item'):
+                link = item.find('h2').find('a')
+                full_url=''
+                if link and 'href' in link.attrs:
+                    full_url = urljoin(self.base_url, link['href'])
+                    article_urls.append(full_url)
+                    self.logger.info(f"找到文章: {full_url}")
+                    text = link.text.strip()
+                    match = re.match(r"([A-Za-z0-9\s'.-]+)([\u4e00-\u9fa5]+)", text)
+                    if match:
+                        english_text = match.group(1).strip()
+                        chinese_text = match.group(2).strip()
+                        title = f"{english_text}={chinese_text}"
+                        # print(title)
+                    else:
+                        title=text
+                    self.titles[full_url] = title
+
+
+                
+            
+            # 反转列表顺序并限制数量
+            article_urls.reverse()
+            self.logger.info(f"总共: {len(article_urls)}篇文章")
+
+            if self.incremental:
+                article_urls = self.filter_new_urls(article_urls)
+            if self.retry_failed:
+                article_urls = self.filter_failed_urls(article_urls)
+
+            selected_urls = article_urls[self.start_pos:self.start_pos + self.count]
+
+            self.logger.info(f"从第{self.start_pos + 1}篇开始，获取{len(selected_urls)}篇文章")
+
+            return selected_urls
+            
+        except Exception as e:
+             self.logger.error(f"获取文章列表失败: {str(e)}")
+             self.failures.record('list', list_url, '', e)
+             return []
+
+    def filter_new_urls(self, article_urls: List[str]) -> List[str]:
+        """过滤掉已在分类索引中且HTML文件已存在的文章"""
+        indexed_ids = self.index.ids()
+        new_urls = []
+        for url in article_urls:
+            base_name = url.split('/')[-1]
+            html_path = os.path.join(self.base_output_dir, f'{base_name}.html')
+            if base_name in indexed_ids and os.path.exists(html_path):
+                continue
+            new_urls.append(url)
+        self.logger.info(f"增量模式: 已有 {len(article_urls) - len(new_urls)} 篇，新增 {len(new_urls)} 篇")
+        return new_urls
+
+    def filter_failed_urls(self, article_urls: List[str]) -> List[str]:
+        """只保留上次运行失败的文章"""
+        failed_ids = self.failures.load_ids()
+        failed_urls = [url for url in article_urls if url.split('/')[-1] in failed_ids]
+        self.logger.info(f"重跑失败文章: {len(failed_urls)} 篇")
+        return failed_urls
+
+    def extract_title(self, soup: BeautifulSoup) -> str:
+         """从列表中获取标题并格式化"""
+          # 查找列表中的 <a> 标签
+         a_tag = soup.find('a', href=True)
+         if a_tag:
+            full_title = a_tag.text.strip()
+            # 使用正则表达式来分割英文和中文标题
+            match = re.match(r'([A-Za-z0-9\s\-\']+)([\u4e00-\u9fa5]+)', full_title)
+            if match:
+               title_en = match.group(1).strip()
+               title_cn = match.group(2).strip()
+               return f"{title_en}={title_cn}"
+         return ""
+
+    def create_directories(self, base_name: str):
+        """创建必要的目录结构"""
+        for dir_name in self.config.directories:
+            dir_path = os.path.join(self.base_output_dir, dir_name)
+            os.makedirs(dir_path, exist_ok=True)
+
+    def download_file(self, url: str, output_path: str) -> bool:
+        
+        if os.path.exists(output_path):
+           self.logger.info(f"文件已存在，跳过下载: {output_path}")
+           return True
+    
+        # 按扩展名区分 image/pdf/mp3 的重试次数
+        ext = os.path.splitext(output_path)[1].lstrip('.')
+        kind = 'image' if ext == 'jpg' else ext
+        try:
+          # 分块写入 .part 文件，大小校验通过后才生成 output_path；中断后重跑会续传
+          with IN_FLIGHT.labels(self.category, 'download').track_inprogress(), \
+                  STAGE_SECONDS.labels(self.category, f'{kind}_download').time():
+              size, elapsed, resumed_from = self.retry.call(
+                  kind, url, lambda: stream_download(self.http, url, output_path, timeout=30))
+          BYTES.labels(self.category, kind).inc(size)
+          if resumed_from:
+             self.logger.info(f"从第 {resumed_from} 字节续传: {output_path}")
+          self.logger.info(f"文件下载成功: {output_path} ({size} 字节, {format_rate(size, elapsed)})")
+          return True
+        except Exception as e:
+           self.logger.error(f"下载文件失败 {url}: {str(e)}")
+           article_id = os.path.splitext(os.path.basename(output_path))[0]
+           self.failures.record(kind, url, article_id, e)
+           return False
+
+
+    def scrape_article(self, url: str) -> Optional[ArticleInfo]:
+        """爬取和保存文章的主要方法"""
+        with IN_FLIGHT.labels(self.category, 'article').track_inprogress(), \
+                STAGE_SECONDS.labels(self.category, 'article').time():
+            article_info = self._scrape_article(url)
+        ARTICLES.labels(self.category, 'ok' if article_info else 'failed').inc()
+        return article_info
+
+    def _scrape_article(self, url: str) -> Optional[ArticleInfo]:
+        try:
+            # 获取页面
+            with STAGE_SECONDS.labels(self.category, 'article_fetch').time():
+                response = self._get(url, timeout=10)
+            response.raise_for_status()
+            BYTES.labels(self.category, 'article').inc(len(response.content))
+            self.snapshots.save(self.category, url.split('/')[-1], url, response.content)
+            
+            # 解析、清理并生成HTML
+            page = self.render_in_pool(response.content, url)
+            
+            if not page:
+                self.logger.error("找不到文章内容")
+                self.failures.record('article', url, url.split('/')[-1], ValueError("找不到文章内容"))
+                return None
+
+            # 提取标题
+            # title = self.extract_title(soup)
+            title=self.titles[url]
+            self.logger.info(f"title: {title}")
+
+            base_name = page.base_name
+            self.journal.record(base_name, FETCHED)
+            
+            # 创建必要的目录
+            self.create_directories(base_name)
+            
+            # 下载图片、PDF和MP3：交给资源下载阶段，全部成功后记录 ASSETS_DONE
+            self.assets.submit([partial(self.download_file, *download) for download in page.downloads],
+                               on_done=partial(self._assets_done, base_name))
+            self.logger.info(f"资源下载队列深度: {self.assets.depth}")
+
+            # 保存HTML文件
+            with STAGE_SECONDS.labels(self.category, 'write').time():
+                file_path = self.save_html(base_name, page.html)
+                
+            self.logger.info(f"文章成功保存到: {file_path}")
+
+            # 创建文章信息对象
+            article_info = ArticleInfo(
+                article_id=base_name,
+                url=f"http://readingstuday.top/bbc/{self.category}/{base_name}.html",
+                title=title,
+                cover=f"https://774663576.github.io/reading_bbc/{self.base_output_dir}/img/{base_name}.jpg",
+                mp3_url=f"https://774663576.github.io/reading_bbc/{self.base_output_dir}/mp3/{base_name}.mp3",
+                pdf_url=f"https://774663576.github.io/reading_bbc/{self.base_output_dir}/pdf/{base_name}.pdf",
+                update_time=datetime.now().strftime('%Y-%m-%d'),
+                views=random.randint(5000, 10000),
+                category=self.category,
+            )
+            if self.config.has_mp4:
+                article_info.mp4_url = f"https://774663576.github.io/reading_bbc/{self.base_output_dir}/mp4/{base_name}.mp4"
+            self.journal.record(base_name, HTML_WRITTEN, article=article_record(article_info))
+            
+            return article_info
+            
+        except Exception as e:
+            self.logger.error(f"处理文章失败: {str(e)}")
+            self.failures.record('article', url, url.split('/')[-1], e)
+            return None
+
+    def render_in_pool(self, content: bytes, url: str) -> Optional[RenderedPage]:
+        """有解析进程池时在子进程中生成HTML，当前线程只等待结果"""
+        with STAGE_SECONDS.labels(self.category, 'render').time():
+            if self.parse_pool is None:
+                page = self.render(content, url)
+            else:
+                page = self.parse_pool.submit(render_page, self.category, self.parser, content, url,
+                                              self.pretty).result()
+                if page:
+                    # 子进程中的清理统计合并回本进程
+                    ARTICLE_CLEANER.merge(page.removed)
+        if page:
+            for stage, seconds in page.timings.items():
+                STAGE_SECONDS.labels(self.category, stage).observe(seconds)
+        return page
+
+    def _assets_done(self, base_name: str, ok: bool):
+        if ok:
+            self.journal.record(base_name, ASSETS_DONE)
+
+    def scrape_all_articles(self, list_url: str):
+        """爬取指定数量的文章"""
+        # 获取文章URL（已经过反转和限制）
+        article_urls = self.get_article_urls(list_url)
+        pending_urls = self.start_journal(article_urls)
+        self.logger.info(f"将处理最新的 {len(pending_urls)} 篇文章")
+        
+        # 遍历爬取每篇文章
+        for index, url in enumerate(pending_urls, 1):
+            try:
+                self.logger.info(f"正在处理第 {index}/{len(pending_urls)} 篇文章: {url}")
+                article_info = self.scrape_article(url)
+                
+                if article_info:
+                    self.logger.info("文章处理成功")
+                
+            except Exception as e:
+                self.logger.error(f"处理文章失败 {url}: {str(e)}")
+                continue
+        
+        # 等待资源下载完成，再从爬取日志重建文章列表，包含之前运行中已完成的文章
+        with STAGE_SECONDS.labels(self.category, 'assets_wait').time():
+            self.assets.join()
+        all_articles = self.finish(article_urls)
+        self.http.log_stats(self.logger)
+        ARTICLE_CLEANER.log_stats(self.logger)
+        return all_articles
+
+    def scrape_all_articles_async(self, list_url: str):
+        """并发爬取指定数量的文章，结果与 scrape_all_articles 相同"""
+        article_urls = self.get_article_urls(list_url)
+        pending_urls = self.start_journal(article_urls)
+        self.logger.info(f"将以并发数 {self.concurrency} 处理最新的 {len(pending_urls)} 篇文章")
+
+        if self.parse_workers:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            crawl_articles(self.scrape_article, pending_urls,
+                           concurrency=article_threads(self.concurrency, self.parse_workers), logger=self.logger)
+        finally:
+            if self.parse_pool:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+        with STAGE_SECONDS.labels(self.category, 'assets_wait').time():
+            self.assets.join()
+
+        all_articles = self.finish(article_urls)
+        self.http.log_stats(self.logger)
+        ARTICLE_CLEANER.log_stats(self.logger)
+        return all_articles
+
+    def start_journal(self, article_urls: List[str]) -> List[str]:
+        """在爬取日志中登记文章，返回本次需要处理的URL"""
+        if self.resume:
+            completed_ids = self.journal.completed_ids()
+            pending_urls = [url for url in article_urls if url.split('/')[-1] not in completed_ids]
+            self.logger.info(f"断点续爬: 已完成 {len(article_urls) - len(pending_urls)} 篇，剩余 {len(pending_urls)} 篇")
+        else:
+            self.journal.reset()
+            pending_urls = article_urls
+
+        for url in pending_urls:
+            self.journal.record(url.split('/')[-1], LISTED, url=url)
+        return pending_urls
+
+    def journal_articles(self, article_urls: List[str]) -> List[dict]:
+        """按列表顺序返回爬取日志中已完成的文章信息"""
+        return self.journal.articles([url.split('/')[-1] for url in article_urls])
+
+    def finish(self, article_urls: List[str]) -> List[dict]:
+        """资源下载完成后调用：从爬取日志重建文章列表，保存索引和失败列表"""
+        with STAGE_SECONDS.labels(self.category, 'finish').time():
+            all_articles = self.journal_articles(article_urls)
+            self.save_articles(all_articles)
+            self.failures.save(self.logger)
+        self.manifest.save()
+        self.manifest.log_stats(self.logger)
+        return all_articles
+
+    def save_articles(self, all_articles: List[dict]):
+        """保存所有文章信息到JSONL索引，再导出App使用的JSON文件
+
+        增量模式和重跑失败文章时与已有索引合并：只有新文章时追加到索引末尾，
+        已有文章有变化时才重写整个索引。导出的JSON内容没有变化时不重写文件。
+        """
+        if all_articles:
+            full_crawl = not (self.incremental or self.retry_failed)
+            try:
+                existing = load_index(self.category)
+            except ValueError as e:
+                if not full_crawl:
+                    raise
+                # 完整爬取已经得到了全部文章，直接用它们重建损坏的索引
+                self.logger.error(f"{e}，用本次爬取的 {len(all_articles)} 篇文章重建索引")
+                existing = []
+            all_articles = keep_stable_fields(existing, all_articles)
+            if full_crawl:
+                if all_articles != existing or not self.index.exists():
+                    self.index.rewrite(all_articles)
+            else:
+                existing_by_id = {article['article_id']: article for article in existing}
+                new_articles = [article for article in all_articles if article['article_id'] not in existing_by_id]
+                if any(existing_by_id.get(article['article_id'], article) != article for article in all_articles):
+                    self.index.rewrite(merge_articles(existing, all_articles))
+                elif not self.index.exists():
+                    self.index.rewrite(existing + new_articles)
+                else:
+                    self.index.append(new_articles)
+                    self.logger.info(f"索引追加 {len(new_articles)} 篇新文章: {self.index.path}")
+
+            output_file = index_path(self.category)
+            if export_legacy(self.category, self.manifest) == SKIPPED:
+                self.logger.info(f"文章信息没有变化: {output_file}")
+            else:
+                self.logger.info(f"所有文章信息已保存到: {output_file}")
+
+def article_threads(concurrency: int, parse_workers: int) -> int:
+    """同时处理的文章数
+
+    每个文章线程提交解析任务后等待结果，线程数少于解析进程数时多出的进程用不上，
+    所以至少为 parse_workers。同一主机的请求数仍由 HostLimiter 限制为 concurrency。
+    """
+    return max(concurrency, parse_workers)
+
+def crawl_categories(categories: List[str], concurrency: int = 4, asset_workers: int = 8,
+                     parse_workers: int = 0, **options) -> Dict[str, List[dict]]:
+    """在一个进程中并发爬取多个栏目
+
+    所有栏目共用一个连接池、限速器、解析进程池和资源下载阶段，所有文章进入同一个调度队列，
+    总并发数为 concurrency。返回 栏目 -> 文章列表。
+    """
+    logger = logging.getLogger(__name__)
+    rate_limiter = AdaptiveRateLimiter()
+    http = HttpClient(HEADERS, per_host=concurrency, rate_limiter=rate_limiter)
+    assets = AssetStage(workers=asset_workers, logger=logger)
+    scrapers = [BBCLearningEnglishScraper(category, concurrency=concurrency, rate_limiter=rate_limiter,
+                                          http=http, assets=assets, **options)
+                for category in categories]
+
+    # 先获取所有栏目的列表页，再把所有待处理文章放进同一个队列
+    article_urls: Dict[str, List[str]] = {}
+    owners: Dict[str, BBCLearningEnglishScraper] = {}
+    for scraper in scrapers:
+        article_urls[scraper.category] = scraper.get_article_urls(scraper.list_url)
+        for url in scraper.start_journal(article_urls[scraper.category]):
+            owners[url] = scraper
+    logger.info(f"{len(scrapers)} 个栏目共 {len(owners)} 篇文章待处理，并发数 {concurrency}")
+
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+    for scraper in scrapers:
+        scraper.parse_pool = parse_pool
+    try:
+        crawl_articles(lambda url: owners[url].scrape_article(url), list(owners),
+                       concurrency=article_threads(concurrency, parse_workers), logger=logger)
+    finally:
+        if parse_pool:
+            parse_pool.shutdown()
+    assets.join()
+
+    results = {scraper.category: scraper.finish(article_urls[scraper.category]) for scraper in scrapers}
+    http.log_stats(logger)
+    ARTICLE_CLEANER.log_stats(logger)
+    return results
+
+def main(categories: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true', help='只爬取索引中还没有的新文章（每周更新时使用）')
+    parser.add_argument('--resume', action='store_true', help='根据爬取日志跳过已完成的文章继续爬取')
+    parser.add_argument('--retry-failed', action='store_true', help='只重跑上次失败列表中的文章')
+    parser.add_argument('--concurrency', type=int, default=4, help='每个主机的并发请求数，大于1时使用异步并发模式')
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1,
+                        help='并发模式下的解析进程数，0表示不用进程池（默认为CPU核数）')
+    parser.add_argument('--pretty', action='store_true', help='输出 prettify() 的缩进格式，便于调试')
+    parser.add_argument('--metrics-port', type=int, help='爬取期间在本机该端口提供 /metrics')
+    parser.add_argument('--metrics-file', help='定期把指标写入该文件（node_exporter textfile 格式）')
+    args = parser.parse_args()
+
+    categories = categories or list(CATEGORIES)
+    options = dict(
+        start_pos=0,  #从第0篇开始
+        count=499, #499       # 每个栏目最多爬取的文章数
+        incremental=args.incremental,  # True时只爬取索引中还没有的新文章
+        resume=args.resume,
+        retry_failed=args.retry_failed,
+        parser=FAST_PARSER,  # 没有安装 lxml 时自动退回 html.parser
+        parse_workers=args.parse_workers,  # 并发模式下解析进程数，0表示不用进程池
+        pretty=args.pretty  # True时输出 prettify() 的缩进格式，便于调试
+    )
+    concurrency = args.concurrency  # 大于1时使用异步并发模式
+
+    exporter = None
+    if args.metrics_port is not None or args.metrics_file:
+        exporter = MetricsExporter(port=args.metrics_port, textfile=args.metrics_file).start()
+    try:
+        if len(categories) > 1:
+            results = crawl_categories(categories, concurrency=concurrency, **options)
+            for category, articles in results.items():
+                print(f"{category}: {len(articles)} 篇文章")
+            print(f"\n爬取完成！总共处理 {sum(len(articles) for articles in results.values())} 篇文章")
+            return
+
+        # 创建爬虫实例
+        scraper = BBCLearningEnglishScraper(categories[0], concurrency=concurrency, **options)
+
+        # 开始爬取
+        if scraper.concurrency > 1:
+            articles = scraper.scrape_all_articles_async(scraper.list_url)
+        else:
+            articles = scraper.scrape_all_articles(scraper.list_url)
+
+        # 打印统计信息
+        print(f"\n爬取完成！总共处理 {len(articles)} 篇文章")
+    finally:
+        if exporter:
+            exporter.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import glob
+import io
+import logging
+import time
+from typing import List, TextIO
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.formatter import HTMLFormatter
+
+
+logger = logging.getLogger(__name__)
+
+FORMATTER = HTMLFormatter.REGISTRY['minimal']  # 与 str(tag) 相同的转义规则
+
+
+def _open_tag(tag: Tag) -> str:
+    attrs = []
+    for key, val in FORMATTER.attributes(tag):
+        if val is None:
+            attrs.append(key)
+            continue
+        if isinstance(val, (list, tuple)):
+            val = ' '.join(val)
+        attrs.append(f"{key}={FORMATTER.quoted_attribute_value(FORMATTER.attribute_value(str(val)))}")
+    prefix = f"{tag.prefix}:" if tag.prefix else ""
+    attribute_string = ' ' + ' '.join(attrs) if attrs else ""
+    void_slash = (FORMATTER.void_element_close_prefix or "") if tag.is_empty_element else ""
+    return f"<{prefix}{tag.name}{attribute_string}{void_slash}>"
+
+
+def _close_tag(tag: Tag) -> str:
+    prefix = f"{tag.prefix}:" if tag.prefix else ""
+    return f"</{prefix}{tag.name}>"
+
+
+def write_compact(tag: Tag, out: TextIO):
+    """把 tag 按原样（不加缩进和换行）逐个节点写入 out，结果与 str(tag) 相同"""
+    # 用栈代替递归：元素是待展开的节点，字符串是待写出的结束标签
+    stack: list = [tag]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str) and not isinstance(node, NavigableString):
+            out.write(node)
+        elif isinstance(node, NavigableString):
+            out.write(node.output_ready(FORMATTER))
+        elif isinstance(node, Tag):
+            if not node.hidden:
+                out.write(_open_tag(node))
+            if node.is_empty_element:
+                continue
+            if not node.hidden:
+                stack.append(_close_tag(node))
+            stack.extend(reversed(node.contents))
+
+
+def serialize(tag: Tag, pretty: bool = False) -> str:
+    """紧凑或缩进格式的HTML字符串"""
+    if pretty:
+        return tag.prettify()
+    buffer = io.StringIO()
+    write_compact(tag, buffer)
+    return buffer.getvalue()
+
+
+def benchmark(paths: List[str], parser: str = 'html.parser') -> bool:
+    """对比 prettify() 和紧凑格式的输出大小和耗时，并检查紧凑格式与 str(tag) 相同"""
+    count = mismatched = 0
+    pretty_bytes = compact_bytes = 0
+    pretty_time = compact_time = 0.0
+    for path in paths:
+        with open(path, 'rb') as f:
+            article = BeautifulSoup(f.read(), parser).find('div', {'role': 'article'})
+        if not article:
+            continue
+        count += 1
+
+        start = time.perf_counter()
+        pretty = serialize(article, pretty=True)
+        pretty_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        compact = serialize(article)
+        compact_time += time.perf_counter() - start
+
+        pretty_bytes += len(pretty.encode('utf-8'))
+        compact_bytes += len(compact.encode('utf-8'))
+        if compact != str(article):
+            mismatched += 1
+            logger.error(f"紧凑输出与 str() 不同: {path}")
+
+    if count:
+        logger.info(f"{count} 篇文章，平均大小: prettify {pretty_bytes / count / 1024:.1f}KB，"
+                    f"紧凑 {compact_bytes / count / 1024:.1f}KB（减少 {1 - compact_bytes / pretty_bytes:.0%}）")
+        logger.info(f"平均耗时: prettify {pretty_time / count * 1000:.2f}ms，紧凑 {compact_time / count * 1000:.2f}ms")
+    return mismatched == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比 prettify() 和紧凑序列化的输出大小和耗时')
+    parser.add_argument('pages', nargs='*', default=['take-away-english/*.html'], help='页面文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    paths = sorted(path for pattern in args.pages for path in glob.glob(pattern))
+    raise SystemExit(0 if benchmark(paths) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+
+
+class SnapshotStore:
+    """按内容寻址保存抓取到的原始文章页面
+
+    objects/<sha256前两位>/<sha256>.html 保存页面内容，相同内容只存一份；
+    refs/<栏目>/<article_id>.json 记录每篇文章最近一次抓取对应的哈希。
+    """
+
+    def __init__(self, root: str = 'snapshots'):
+        self.root = root
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f'{digest}.html')
+
+    def _ref_path(self, category: str, article_id: str) -> str:
+        return os.path.join(self.root, 'refs', category, f'{article_id}.json')
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, content: bytes) -> str:
+        """保存页面内容，返回其 sha256"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, content)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def save(self, category: str, article_id: str, url: str, content: bytes) -> str:
+        """保存一篇文章的原始页面并更新它的引用"""
+        digest = self.put(content)
+        ref = {
+            'article_id': article_id,
+            'url': url,
+            'sha256': digest,
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._write_atomic(self._ref_path(category, article_id),
+                           json.dumps(ref, ensure_ascii=False).encode('utf-8'))
+        return digest
+
+    def ref(self, category: str, article_id: str) -> Optional[dict]:
+        path = self._ref_path(category, article_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def refs(self, category: str) -> Iterator[dict]:
+        """按 article_id 顺序列出一个栏目的所有快照引用"""
+        ref_dir = os.path.join(self.root, 'refs', category)
+        if not os.path.isdir(ref_dir):
+            return
+        for name in sorted(os.listdir(ref_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(ref_dir, name), 'r', encoding='utf-8') as f:
+                    yield json.load(f)
@@ -0,0 +1,144 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Sequence
+
+
+MYSQL_CONFIG = dict(
+    host='59.110.149.111',
+    user='root',
+    password='SP123456!',
+    database='reading'
+)
+
+
+class StorageBackend:
+    """数据库后端：负责建立连接，以及不同数据库在建表、占位符和 upsert 语法上的差异"""
+
+    name = ''
+    placeholder = '?'
+    id_column = ''
+    max_params = 999  # 一条语句最多的参数个数
+
+    def connect(self):
+        raise NotImplementedError
+
+    def upsert_clause(self, key: Sequence[str], columns: Sequence[str]) -> str:
+        """唯一键 key 冲突时更新 columns"""
+        raise NotImplementedError
+
+    def index_exists_sql(self, table: str) -> str:
+        """参数为索引名，有结果时索引已存在"""
+        raise NotImplementedError
+
+    def dedupe_sql(self, table: str, key: Sequence[str]) -> str:
+        """删除 key 重复的行，保留 id 最小的一行"""
+        raise NotImplementedError
+
+
+class MySQLBackend(StorageBackend):
+    name = 'mysql'
+    placeholder = '%s'
+    id_column = 'id INT AUTO_INCREMENT PRIMARY KEY'
+    max_params = 65535
+
+    def __init__(self, **config):
+        self.config = dict(MYSQL_CONFIG, **config)
+
+    def connect(self):
+        import mysql.connector
+        return mysql.connector.connect(**self.config)
+
+    def upsert_clause(self, key: Sequence[str], columns: Sequence[str]) -> str:
+        return 'ON DUPLICATE KEY UPDATE ' + ', '.join(f'{column}=VALUES({column})' for column in columns)
+
+    def index_exists_sql(self, table: str) -> str:
+        return f'SHOW INDEX FROM {table} WHERE Key_name = %s'
+
+    def dedupe_sql(self, table: str, key: Sequence[str]) -> str:
+        # MySQL 不能在 DELETE 的子查询中读同一张表，用自连接
+        condition = ' AND '.join(f't1.{column} = t2.{column}' for column in key)
+        return f'DELETE t1 FROM {table} t1 JOIN {table} t2 ON {condition} AND t1.id > t2.id'
+
+
+class SQLiteBackend(StorageBackend):
+    """本地 SQLite 文件，用于测试和离线测试导入性能"""
+
+    name = 'sqlite'
+    placeholder = '?'
+    id_column = 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+    max_params = 32766
+
+    def __init__(self, path: str, timeout: float = 60):
+        self.path = path
+        self.timeout = timeout  # 其他连接正在写入时等待的秒数
+
+    def connect(self):
+        # 连接池中的连接会在不同线程中使用，同一时间只有一个线程持有
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        if self.path != ':memory:':
+            # WAL 模式下写入时不阻塞读取
+            conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def upsert_clause(self, key: Sequence[str], columns: Sequence[str]) -> str:
+        return (f"ON CONFLICT({', '.join(key)}) DO UPDATE SET "
+                + ', '.join(f'{column}=excluded.{column}' for column in columns))
+
+    def index_exists_sql(self, table: str) -> str:
+        return "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?"
+
+    def dedupe_sql(self, table: str, key: Sequence[str]) -> str:
+        return f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {', '.join(key)})"
+
+
+class ConnectionPool:
+    """最多 size 个连接，按需建立，用完放回池中复用"""
+
+    def __init__(self, backend: StorageBackend, size: int = 4):
+        self.backend = backend
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.backend.connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # 连接数已达上限，等待其他线程归还
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """取出一个连接，退出时放回池中；出错时先回滚未提交的事务"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
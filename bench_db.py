@@ -0,0 +1,116 @@
+import argparse
+import logging
+import os
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from bbc_categories import CATEGORIES
+from bbc_storage import SQLiteBackend
+from insert import QUERY_INDEX_VERSION, TABLE, article_row, migrate, upsert_rows
+
+
+logger = logging.getLogger(__name__)
+
+FIRST_DAY = date(2015, 1, 1)
+DAYS = 365 * 10
+
+# App 的查询，参数由 params(rng, rows_per_category) 随机生成
+QUERIES: Dict[str, Tuple[str, Callable]] = {
+    '栏目最新20篇': (
+        f'SELECT * FROM {TABLE} WHERE category = ? ORDER BY update_time DESC LIMIT 20',
+        lambda rng, n: (rng.choice(list(CATEGORIES)),),
+    ),
+    '栏目某日期之后更新': (
+        f'SELECT * FROM {TABLE} WHERE category = ? AND update_time >= ? ORDER BY update_time DESC LIMIT 50',
+        lambda rng, n: (rng.choice(list(CATEGORIES)), str(FIRST_DAY + timedelta(days=rng.randrange(DAYS - 30, DAYS)))),
+    ),
+    '按article_id查找': (
+        f'SELECT * FROM {TABLE} WHERE article_id = ?',
+        lambda rng, n: (f'ep-{rng.randrange(n):07d}',),
+    ),
+}
+
+
+def synthetic_articles(rows: int, seed: int = 0) -> Iterator[dict]:
+    """生成 rows 篇假文章，平均分布在各个栏目和十年的日期中"""
+    rng = random.Random(seed)
+    categories = list(CATEGORIES)
+    for n in range(rows):
+        category = categories[n % len(categories)]
+        article_id = f'ep-{n // len(categories):07d}'
+        base = f'https://774663576.github.io/reading_bbc/{category}'
+        yield {
+            'article_id': article_id,
+            'url': f'http://readingstuday.top/bbc/{category}/{article_id}.html',
+            'title': f'Title {n}',
+            'cover': f'{base}/img/{article_id}.jpg',
+            'mp3_url': f'{base}/mp3/{article_id}.mp3',
+            'pdf_url': f'{base}/pdf/{article_id}.pdf',
+            'update_time': str(FIRST_DAY + timedelta(days=rng.randrange(DAYS))),
+            'views': rng.randint(5000, 10000),
+            'category': category,
+        }
+
+
+def measure(conn, repeat: int, rows_per_category: int, seed: int = 1) -> Dict[str, List[float]]:
+    """每个查询执行 repeat 次，返回 查询 -> 每次耗时（毫秒）"""
+    rng = random.Random(seed)
+    timings = {}
+    for name, (sql, params) in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            args = params(rng, rows_per_category)
+            start = time.perf_counter()
+            conn.execute(sql, args).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        plan = ' / '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', args))
+        logger.info(f"{name}: {plan}")
+        timings[name] = samples
+    return timings
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(q) - 1] if len(samples) > 1 else samples[0]
+
+
+def report(before: Dict[str, List[float]], after: Dict[str, List[float]]):
+    for name in QUERIES:
+        logger.info(f"{name}: 没有查询索引 p50 {percentile(before[name], 50):.2f}ms p99 {percentile(before[name], 99):.2f}ms，"
+                    f"有查询索引 p50 {percentile(after[name], 50):.2f}ms p99 {percentile(after[name], 99):.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在本地 SQLite 中生成假数据，测试 App 查询在加索引前后的延迟')
+    parser.add_argument('--db', default='bench_articles.db', help='SQLite 数据库文件，每次运行重新生成')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='生成的行数')
+    parser.add_argument('--repeat', type=int, default=100, help='每个查询执行的次数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if os.path.exists(args.db):
+        os.remove(args.db)
+
+    backend = SQLiteBackend(args.db)
+    conn = backend.connect()
+    try:
+        # 先建到查询索引之前的版本，写入数据后测一次，再升级到最新版本测一次
+        migrate(conn, backend, target=QUERY_INDEX_VERSION - 1)
+        start = time.perf_counter()
+        total, _ = upsert_rows(conn, backend, map(article_row, synthetic_articles(args.rows)),
+                               batch_size=500, chunk_size=50_000)
+        logger.info(f"生成 {total} 行，耗时 {time.perf_counter() - start:.1f}秒")
+
+        rows_per_category = args.rows // len(CATEGORIES)
+        before = measure(conn, args.repeat, rows_per_category)
+        migrate(conn, backend)
+        after = measure(conn, args.repeat, rows_per_category)
+        report(before, after)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
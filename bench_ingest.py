@@ -0,0 +1,124 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bbc_index import iter_index_file, legacy_chunks
+from bbc_storage import SQLiteBackend
+from bench_db import synthetic_articles
+from insert import load_articles, migrate
+
+
+logger = logging.getLogger(__name__)
+
+
+def generate_index(path: str, size_mb: int) -> int:
+    """逐篇写出约 size_mb MB 的假索引（旧格式的 JSON 数组或 JSONL），返回文章数"""
+    limit = size_mb * 1024 * 1024
+    written = count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for article in synthetic_articles(sys.maxsize):
+                written += f.write(json.dumps(article, ensure_ascii=False) + '\n')
+                count += 1
+                if written >= limit:
+                    break
+            return count
+
+        def articles():
+            nonlocal count
+            for article in synthetic_articles(sys.maxsize):
+                yield article
+                count += 1
+                if f.tell() >= limit:
+                    return
+
+        f.writelines(legacy_chunks(articles()))
+    return count
+
+
+def peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 的单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def ingest(path: str, mode: str, db: str) -> dict:
+    """在当前进程中把 path 导入 SQLite，mode 为 stream（逐条解析）或 load（json.load 整个文件）"""
+    if mode == 'stream':
+        articles = iter_index_file(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            articles = json.load(f)
+    backend = SQLiteBackend(db)
+    conn = backend.connect()
+    try:
+        migrate(conn, backend)
+        rows, elapsed = load_articles(conn, backend, articles)
+    finally:
+        conn.close()
+    return {'rows': rows, 'elapsed': elapsed, 'peak_rss_mb': peak_rss_mb()}
+
+
+def run_child(path: str, mode: str, workdir: str) -> dict:
+    """在子进程中导入，这样每次测到的内存峰值互不影响"""
+    db = os.path.join(workdir, f'{mode}-{os.path.basename(path)}.db')
+    output = subprocess.run([sys.executable, __file__, '--ingest', path, '--mode', mode, '--db', db],
+                            check=True, capture_output=True, text=True).stdout
+    os.remove(db)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成大索引文件，验证逐条解析导入的内存峰值与文件大小无关')
+    parser.add_argument('--size-mb', type=int, default=300, help='最大的索引文件大小')
+    parser.add_argument('--compare', action='store_true', help='同时测试 json.load 整个文件的内存峰值')
+    parser.add_argument('--workdir', help='存放生成文件的目录，默认使用临时目录')
+    parser.add_argument('--ingest', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', default='stream', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.ingest:
+        print(json.dumps(ingest(args.ingest, args.mode, args.db)))
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        results = []
+        # 同一格式取两种大小，逐条解析时两者的内存峰值应该基本相同
+        for size_mb in (max(1, args.size_mb // 10), args.size_mb):
+            for suffix in ('.json', '.jsonl'):
+                path = os.path.join(workdir, f'articles-{size_mb}mb{suffix}')
+                start = time.perf_counter()
+                count = generate_index(path, size_mb)
+                logger.info(f"生成 {path}: {count} 篇文章，{os.path.getsize(path) / 1024 / 1024:.0f}MB，"
+                            f"耗时 {time.perf_counter() - start:.1f}秒")
+                modes = ['stream', 'load'] if args.compare and suffix == '.json' else ['stream']
+                for mode in modes:
+                    result = run_child(path, mode, workdir)
+                    results.append((size_mb, suffix, mode, result))
+                    logger.info(f"{size_mb}MB {suffix} {mode}: 导入 {result['rows']} 行，"
+                                f"{result['rows'] / result['elapsed']:.0f} 行/秒，内存峰值 {result['peak_rss_mb']:.0f}MB")
+                os.remove(path)
+
+        for size_mb, suffix, mode, result in results:
+            print(f"{size_mb:>5}MB {suffix:<6} {mode:<6} 内存峰值 {result['peak_rss_mb']:>7.0f}MB  "
+                  f"{result['rows']} 行")
+
+    # 文件大小相差十倍，逐条解析的内存峰值相差超过 20% 时认为内存占用随文件增长
+    ok = True
+    for suffix in ('.json', '.jsonl'):
+        small, large = [result['peak_rss_mb'] for _, s, mode, result in results if s == suffix and mode == 'stream']
+        if large > small * 1.2:
+            logger.error(f"{suffix} 逐条解析的内存峰值随文件增长: {small:.0f}MB -> {large:.0f}MB")
+            ok = False
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from bbc_categories import CATEGORIES
+from bbc_fixture import FixtureServer, FixtureStore, ReplayHttpClient, seed_from_pages
+from bbc_metrics import STAGE_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+# 报告中各阶段的顺序，取自爬虫的 bbc_stage_seconds 指标；没有出现的阶段不显示
+STAGES = ('list_fetch', 'article_fetch', 'render', 'parse', 'clean', 'serialize', 'write',
+          'image_download', 'pdf_download', 'mp3_download', 'retry_sleep', 'assets_wait', 'article', 'finish')
+
+
+def stage_summary(category: str) -> Dict[str, dict]:
+    """从爬虫自己的阶段耗时直方图读出次数和 p50/p99（按分桶插值估计）"""
+    summary = {}
+    for (label_category, stage), histogram in STAGE_SECONDS.children():
+        if label_category == category and histogram.count:
+            summary[stage] = {
+                'count': histogram.count,
+                'p50_ms': histogram.quantile(0.5) * 1000,
+                'p99_ms': histogram.quantile(0.99) * 1000,
+            }
+    return summary
+
+
+def run_category(category: str, server_url: str, count: int, concurrency: int, parse_workers: int) -> dict:
+    """在当前目录中通过回放服务器爬取一个栏目，返回吞吐量、各阶段耗时和内存峰值"""
+    # 爬虫的 INFO 日志会影响计时，只保留警告
+    logging.basicConfig(level=logging.WARNING)
+    from bbc_ratelimit import AdaptiveRateLimiter
+    from bbc_scraper import HEADERS, BBCLearningEnglishScraper
+
+    # 本地服务器不需要限速，只保留限速器对错误的反应
+    rate_limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=concurrency)
+    http = ReplayHttpClient(server_url, HEADERS, per_host=concurrency, rate_limiter=rate_limiter)
+    scraper = BBCLearningEnglishScraper(category, count=count, concurrency=concurrency, http=http,
+                                        rate_limiter=rate_limiter, parse_workers=parse_workers)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        articles = scraper.scrape_all_articles_async(scraper.list_url)
+    else:
+        articles = scraper.scrape_all_articles(scraper.list_url)
+    elapsed = time.perf_counter() - start
+    http.close()
+    return {
+        'articles': len(articles),
+        'elapsed': elapsed,
+        'stages': stage_summary(category),
+        # Linux 上 ru_maxrss 的单位是 KB
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_child(category: str, server: FixtureServer, args, workdir: str) -> dict:
+    """在单独的进程和空目录中爬取一个栏目，内存峰值和输出文件互不影响"""
+    category_dir = os.path.join(workdir, category)
+    os.makedirs(category_dir)
+    bytes_before = server.stats['bytes']
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', category, '--server', server.url,
+         '--count', str(args.count), '--concurrency', str(args.concurrency),
+         '--parse-workers', str(args.parse_workers)],
+        cwd=category_dir, check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                                        os.environ.get('PYTHONPATH')])))).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['bytes'] = server.stats['bytes'] - bytes_before
+    return result
+
+
+def report(results: Dict[str, dict]):
+    print(f"{'栏目':<24}{'文章':>6}{'篇/秒':>9}{'MB/秒':>9}{'内存峰值MB':>12}")
+    for category, result in results.items():
+        elapsed = result['elapsed'] or 1e-9
+        print(f"{category:<24}{result['articles']:>6}{result['articles'] / elapsed:>9.1f}"
+              f"{result['bytes'] / elapsed / 1024 / 1024:>9.1f}{result['peak_rss_mb']:>12.0f}")
+    print()
+    print(f"{'栏目':<24}{'阶段':<16}{'次数':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for category, result in results.items():
+        stages = result['stages']
+        for stage in [stage for stage in STAGES if stage in stages] + sorted(set(stages) - set(STAGES)):
+            timing = stages[stage]
+            print(f"{category:<24}{stage:<16}{timing['count']:>6}{timing['p50_ms']:>10.2f}{timing['p99_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通过本地回放服务器离线测试各栏目爬虫的吞吐量')
+    parser.add_argument('categories', nargs='*', default=list(CATEGORIES))
+    parser.add_argument('--fixtures', default='fixtures', help='录制文件目录，不存在时用已保存的页面生成')
+    parser.add_argument('--pages', default='take-away-english/*.html', help='生成假数据用的页面')
+    parser.add_argument('--count', type=int, default=100, help='每个栏目爬取的文章数')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发数，1 表示顺序爬取')
+    parser.add_argument('--parse-workers', type=int, default=0, help='解析进程数，0 表示不用进程池')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟的上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的请求比例')
+    parser.add_argument('--json', help='把结果另存为 JSON 文件')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_category(args.child, args.server, args.count, args.concurrency, args.parse_workers)
+        print(json.dumps(result))
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = FixtureStore(args.fixtures)
+    if not store.entries:
+        pages = sorted(glob.glob(args.pages))
+        count = seed_from_pages(store, pages, CATEGORIES)
+        logger.info(f"用 {len(pages)} 个已保存页面生成了 {count} 个文章页: {store.index_path}")
+
+    server = FixtureServer(store, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate).start()
+    logger.info(f"回放服务器: {server.url}，延迟 {args.latency}s，随机延迟 {args.jitter}s，错误率 {args.error_rate}")
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for category in args.categories:
+                results[category] = run_child(category, server, args, workdir)
+                logger.info(f"{category}: {results[category]['articles']} 篇，耗时 {results[category]['elapsed']:.1f}秒")
+    finally:
+        server.shutdown()
+    logger.info(f"服务器: 请求 {server.stats['requests']} 次，注入错误 {server.stats['errors']} 次，"
+                f"未录制 {server.stats['missing']} 次")
+
+    report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,367 @@
+import argparse
+import hashlib
 import json
-import mysql.connector
-
-# 连接到 MySQL 数据库
-conn = mysql.connector.connect(
-    host='59.110.149.111',
-    user='root',
-    password='SP123456!',
-    database='reading'
-)
-cursor = conn.cursor()
-
-# 创建表
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS bbc_english_articles (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    article_id VARCHAR(20),
-    url VARCHAR(255),
-    title VARCHAR(255),
-    cover VARCHAR(255),
-    mp3_url VARCHAR(255),
-    mp4_url VARCHAR(255),
-    pdf_url VARCHAR(255),
-    update_time DATE,
-    views INT,
-    category VARCHAR(50)
-);
-''')
-
-# 读取 JSON 文件
-with open('/Users/songbinbin/Downloads/reading_app/book/read_book/voa_tingclass/bbc/authentic-real-english_articles.json', 'r', encoding='utf-8') as file:
-    data = json.load(file)
-
-# 插入数据
-for item in data:
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bbc_categories import CATEGORIES
+from bbc_index import ArticleIndex, iter_index_file
+from bbc_storage import MYSQL_CONFIG, ConnectionPool, MySQLBackend, SQLiteBackend, StorageBackend
+
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'bbc_english_articles'
+DATA_COLUMNS = ('article_id', 'url', 'title', 'cover', 'mp3_url', 'mp4_url', 'pdf_url', 'update_time', 'views', 'category')
+# fingerprint 是其他各列的哈希，同步时只写入哈希变化的行
+COLUMNS = DATA_COLUMNS + ('fingerprint',)
+UNIQUE_KEY = ('category', 'article_id')  # 同一篇文章重复导入时更新而不是新增一行
+UNIQUE_INDEX = 'uniq_category_article'
+
+_UPDATE_COLUMNS = [column for column in COLUMNS if column not in UNIQUE_KEY]
+
+
+def _index_exists(cursor, backend: StorageBackend, name: str) -> bool:
+    cursor.execute(backend.index_exists_sql(TABLE), (name,))
+    return bool(cursor.fetchall())
+
+
+def _create_index(cursor, backend: StorageBackend, name: str, columns: Tuple[str, ...], unique: bool = False):
+    if not _index_exists(cursor, backend, name):
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {TABLE} ({', '.join(columns)})")
+
+
+def _create_articles_table(cursor, backend: StorageBackend):
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {TABLE} (
+        {backend.id_column},
+        article_id VARCHAR(20),
+        url VARCHAR(255),
+        title VARCHAR(255),
+        cover VARCHAR(255),
+        mp3_url VARCHAR(255),
+        mp4_url VARCHAR(255),
+        pdf_url VARCHAR(255),
+        update_time DATE,
+        views INT,
+        category VARCHAR(50)
+    )
+    ''')
+
+
+def _add_unique_key(cursor, backend: StorageBackend):
+    # 旧版脚本建的表没有唯一索引，可能已有重复行，建索引前先删除
+    if not _index_exists(cursor, backend, UNIQUE_INDEX):
+        cursor.execute(backend.dedupe_sql(TABLE, UNIQUE_KEY))
+        if cursor.rowcount > 0:
+            logger.warning(f"删除了 {cursor.rowcount} 行重复数据")
+        _create_index(cursor, backend, UNIQUE_INDEX, UNIQUE_KEY, unique=True)
+
+
+def _add_fingerprint(cursor, backend: StorageBackend):
+    cursor.execute(f'SELECT * FROM {TABLE} LIMIT 0')
+    existing_columns = {description[0] for description in cursor.description}
+    cursor.fetchall()
+    if 'fingerprint' not in existing_columns:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD COLUMN fingerprint CHAR(40)')
+
+
+def _add_query_indexes(cursor, backend: StorageBackend):
+    # App 的查询: 某栏目最新的 N 篇、某日期之后更新的文章、按 article_id 查找
+    _create_index(cursor, backend, 'idx_category_update_time', ('category', 'update_time'))
+    _create_index(cursor, backend, 'idx_article_id', ('article_id',))
+
+
+# (版本, 说明, 迁移函数)，按版本顺序执行。每个迁移都先检查是否已经完成，
+# 在没有 schema_migrations 表的旧数据库上重新执行也是安全的。
+MIGRATIONS = [
+    (1, '创建文章表', _create_articles_table),
+    (2, '(category, article_id) 唯一索引', _add_unique_key),
+    (3, 'fingerprint 列', _add_fingerprint),
+    (4, '(category, update_time) 和 article_id 查询索引', _add_query_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+QUERY_INDEX_VERSION = 4
+
+
+def schema_version(conn) -> int:
+    cursor = conn.cursor()
     cursor.execute('''
-    INSERT INTO bbc_english_articles (article_id,url, title, cover, mp3_url,mp4_url, pdf_url, update_time, views, category)
-    VALUES (%s,%s, %s, %s, %s,%s, %s, %s, %s, %s)
-    ''', (
-        item['article_id'],
-        item['url'],
-        item['title'],
-        item['cover'],
-        item['mp3_url'],
-        "",
-        item['pdf_url'],
-        item['update_time'],
-        item['views'],
-        item['category']
-    ))
-
-# 提交事务
-conn.commit()
-
-# 关闭连接
-cursor.close()
-conn.close()
-
-print("数据插入完成")
\ No newline at end of file
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(255),
+        applied_at VARCHAR(32)
+    )
+    ''')
+    cursor.execute('SELECT MAX(version) FROM schema_migrations')
+    version = cursor.fetchone()[0] or 0
+    cursor.close()
+    return version
+
+
+def migrate(conn, backend: StorageBackend, target: int = SCHEMA_VERSION) -> int:
+    """把数据库结构升级到 target 版本，返回升级后的版本"""
+    version = schema_version(conn)
+    cursor = conn.cursor()
+    for number, description, apply in MIGRATIONS:
+        if version < number <= target:
+            start = time.perf_counter()
+            apply(cursor, backend)
+            cursor.execute(f'INSERT INTO schema_migrations (version, description, applied_at) '
+                           f'VALUES ({backend.placeholder}, {backend.placeholder}, {backend.placeholder})',
+                           (number, description, datetime.now().isoformat(timespec='seconds')))
+            conn.commit()
+            version = number
+            logger.info(f"数据库结构升级到版本 {number}: {description}，耗时 {time.perf_counter() - start:.2f}秒")
+    cursor.close()
+    return version
+
+
+def article_row(item: dict) -> tuple:
+    row = dict(item, mp4_url=item.get('mp4_url') or "")
+    values = [row[column] for column in DATA_COLUMNS]
+    fingerprint = hashlib.sha1(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return tuple(values) + (fingerprint,)
+
+
+def row_key(row: tuple) -> Tuple[str, str]:
+    return row[COLUMNS.index('category')], row[COLUMNS.index('article_id')]
+
+
+def batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_sql(backend: StorageBackend, count: int) -> str:
+    """count 行的多行 INSERT ... upsert 语句"""
+    values = '(' + ', '.join([backend.placeholder] * len(COLUMNS)) + ')'
+    return (f"INSERT INTO {TABLE} ({', '.join(COLUMNS)}) VALUES "
+            + ', '.join([values] * count) + ' ' + backend.upsert_clause(UNIQUE_KEY, _UPDATE_COLUMNS))
+
+
+def upsert_rows(conn, backend: StorageBackend, rows: Iterable[tuple],
+                batch_size: int = 500, chunk_size: int = 5000) -> Tuple[int, int]:
+    """批量 upsert，每条语句写 batch_size 行，每 chunk_size 行提交一次事务
+
+    一个事务中途失败时回滚这个事务并抛出异常，之前提交的部分保留，重新运行即可继续。
+    返回 (写入行数, 语句数)。
+    """
+    batch_size = max(1, min(batch_size, backend.max_params // len(COLUMNS)))
+    cursor = conn.cursor()
+    total = pending = statements = 0
+    try:
+        for batch in batches(rows, batch_size):
+            cursor.execute(upsert_sql(backend, len(batch)), list(chain.from_iterable(batch)))
+            statements += 1
+            total += len(batch)
+            pending += len(batch)
+            if pending >= chunk_size:
+                conn.commit()
+                pending = 0
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return total, statements
+
+
+def load_articles(conn, backend: StorageBackend, articles: Iterable[dict],
+                  batch_size: int = 500, chunk_size: int = 5000) -> Tuple[int, float]:
+    """全部文章批量 upsert，返回 (写入行数, 耗时秒数)"""
+    start = time.perf_counter()
+    total, _ = upsert_rows(conn, backend, map(article_row, articles), batch_size, chunk_size)
+    return total, time.perf_counter() - start
+
+
+@dataclass
+class SyncResult:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    statements: int = 0
+    elapsed: float = 0.0
+
+    def __add__(self, other: 'SyncResult') -> 'SyncResult':
+        return SyncResult(*(a + b for a, b in zip(astuple(self), astuple(other))))
+
+
+def load_fingerprints(conn, backend: StorageBackend, category: Optional[str] = None) -> Dict[Tuple[str, str], str]:
+    """数据库中已有的 (category, article_id) -> fingerprint，指定 category 时只读这个栏目"""
+    cursor = conn.cursor()
+    if category:
+        cursor.execute(f'SELECT category, article_id, fingerprint FROM {TABLE} '
+                       f'WHERE category = {backend.placeholder}', (category,))
+    else:
+        cursor.execute(f'SELECT category, article_id, fingerprint FROM {TABLE}')
+    fingerprints = {(category, article_id): fingerprint for category, article_id, fingerprint in cursor.fetchall()}
+    cursor.close()
+    return fingerprints
+
+
+def delete_rows(conn, backend: StorageBackend, keys: Iterable[Tuple[str, str]], batch_size: int = 500) -> Tuple[int, int]:
+    """按栏目分组批量删除，返回 (删除行数, 语句数)"""
+    by_category: Dict[str, List[str]] = defaultdict(list)
+    for category, article_id in keys:
+        by_category[category].append(article_id)
+    cursor = conn.cursor()
+    total = statements = 0
+    try:
+        for category, article_ids in by_category.items():
+            for batch in batches(article_ids, min(batch_size, backend.max_params - 1)):
+                placeholders = ', '.join([backend.placeholder] * len(batch))
+                cursor.execute(f'DELETE FROM {TABLE} WHERE category = {backend.placeholder} '
+                               f'AND article_id IN ({placeholders})', [category] + batch)
+                statements += 1
+                total += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return total, statements
+
+
+def sync_articles(conn, backend: StorageBackend, articles: Iterable[dict], delete: bool = True,
+                  batch_size: int = 500, chunk_size: int = 5000, category: Optional[str] = None) -> SyncResult:
+    """只把与数据库不同的文章写入数据库
+
+    新文章插入，fingerprint 变化的文章更新；delete 为 True 时，删除输入中出现过的栏目里
+    索引已经没有的文章，其他栏目不受影响。articles 只包含一个栏目时传入 category，
+    只读取这个栏目已有的 fingerprint。
+    """
+    result = SyncResult()
+    start = time.perf_counter()
+    existing = load_fingerprints(conn, backend, category)
+    result.statements += 1
+    seen = set()
+
+    def changed_rows():
+        for row in map(article_row, articles):
+            key = row_key(row)
+            if key in seen:
+                continue
+            seen.add(key)
+            previous = existing.get(key, False)
+            if previous == row[-1]:
+                result.unchanged += 1
+                continue
+            if previous is False:
+                result.inserted += 1
+            else:
+                result.updated += 1
+            yield row
+
+    _, statements = upsert_rows(conn, backend, changed_rows(), batch_size, chunk_size)
+    result.statements += statements
+
+    if delete:
+        categories = {category for category, _ in seen}
+        stale = [key for key in existing if key[0] in categories and key not in seen]
+        result.deleted, statements = delete_rows(conn, backend, stale, batch_size)
+        result.statements += statements
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_parallel(pool: ConnectionPool, units: Dict[Optional[str], Iterable[dict]],
+                 task: Callable, workers: int) -> Dict[Optional[str], object]:
+    """每个栏目在单独的线程中用连接池中的一个连接处理，返回 栏目 -> task 的结果
+
+    task(conn, category, articles)；category 为 None 表示输入包含多个栏目。
+    """
+    def run(category, articles):
+        with pool.connection() as conn:
+            return task(conn, category, articles)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {category: executor.submit(run, category, articles) for category, articles in units.items()}
+        return {category: future.result() for category, future in futures.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把文章索引批量导入数据库，已存在的文章会被更新')
+    parser.add_argument('files', nargs='*', help='索引文件（.json 或 .jsonl），默认为 output 中所有栏目的索引')
+    parser.add_argument('--sync', action='store_true', help='只写入与数据库不同的文章，并删除索引中已经没有的文章')
+    parser.add_argument('--no-delete', action='store_true', help='同步时不删除文章')
+    parser.add_argument('--sqlite', help='导入到本地 SQLite 数据库文件，而不是 MySQL')
+    parser.add_argument('--host', default=MYSQL_CONFIG['host'], help='MySQL 主机，可以指向本地数据库测试导入性能')
+    parser.add_argument('--user', default=MYSQL_CONFIG['user'])
+    parser.add_argument('--password', default=MYSQL_CONFIG['password'])
+    parser.add_argument('--database', default=MYSQL_CONFIG['database'])
+    parser.add_argument('--workers', type=int, default=4, help='并行导入的栏目数，也是连接池大小')
+    parser.add_argument('--batch-size', type=int, default=500, help='每条 INSERT 语句的行数')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='每个事务的行数')
+    args = parser.parse_args()
+    # 栏目索引不存在时跳过，但命令行上明确给出的文件必须存在
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        parser.error(f"索引文件不存在: {', '.join(missing)}")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # 连接到数据库
+    if args.sqlite:
+        backend = SQLiteBackend(args.sqlite)
+    else:
+        backend = MySQLBackend(host=args.host, user=args.user, password=args.password, database=args.database)
+    pool = ConnectionPool(backend, size=max(1, args.workers))
+    try:
+        # 创建表和索引
+        with pool.connection() as conn:
+            migrate(conn, backend)
+
+        # 逐条读取索引文件，.jsonl 不需要把整个文件读入内存；默认每个栏目并行导入
+        if args.files:
+            units = {None: chain.from_iterable(iter_index_file(path) for path in args.files)}
+        else:
+            units = {category: ArticleIndex(category) for category in CATEGORIES}
+
+        start = time.perf_counter()
+        if args.sync:
+            # 索引文件损坏时 sync_articles 在删除之前抛出异常，这个栏目不会删除任何文章
+            try:
+                results = run_parallel(pool, units, lambda conn, category, articles: sync_articles(
+                    conn, backend, articles, delete=not args.no_delete, batch_size=args.batch_size,
+                    chunk_size=args.chunk_size, category=category), args.workers)
+            except ValueError as e:
+                logger.error(f"同步已中止，没有删除该栏目的文章: {e}")
+                raise SystemExit(1)
+            result = sum(results.values(), SyncResult())
+            logger.info(f"同步完成: 新增 {result.inserted}，更新 {result.updated}，删除 {result.deleted}，"
+                        f"未变化 {result.unchanged}，共 {result.statements} 条语句，"
+                        f"耗时 {time.perf_counter() - start:.2f}秒")
+        else:
+            # 插入数据
+            results = run_parallel(pool, units, lambda conn, category, articles: load_articles(
+                conn, backend, articles, args.batch_size, args.chunk_size), args.workers)
+            for category, (rows, elapsed) in results.items():
+                if category and rows:
+                    logger.info(f"{category}: 写入 {rows} 行，耗时 {elapsed:.2f}秒")
+            total = sum(rows for rows, _ in results.values())
+            elapsed = time.perf_counter() - start
+            logger.info(f"写入 {total} 行，耗时 {elapsed:.2f}秒，{total / elapsed if elapsed else 0:.0f} 行/秒")
+    finally:
+        # 关闭连接
+        pool.close()
+
+    print("数据插入完成")
+
+
+if __name__ == "__main__":
+    main()